@@ -0,0 +1,184 @@
+import math
+import logging
+from collections import deque
+from threading import Lock
+
+
+class ClockEstimator(object):
+    """NTP-style estimate of a client's clock relative to the server's.
+
+    The server sends its time t0, the client answers with t0 and its own time tc,
+    and the reply arrives at t1. Assuming a symmetric path, the client read its
+    clock at t0 + rtt / 2, so offset = tc - (t0 + rtt / 2). The sample with the
+    lowest round trip in the window is the least disturbed by queueing, so its
+    offset is the one used.
+    """
+
+    def __init__(self, window=16):
+        self.samples = deque(maxlen=window)  # (rtt, offset)
+        # samples arrive on the IOLoop thread; the host's tooltip reads them
+        # on the Qt thread
+        self.__lock = Lock()
+
+    def add_sample(self, t0, tc, t1):
+        rtt = t1 - t0
+        if rtt < 0:
+            return
+        with self.__lock:
+            self.samples.append((rtt, tc - (t0 + rtt / 2)))
+
+    def snapshot(self):
+        """a copy of the samples, safe to take from any thread"""
+        with self.__lock:
+            return list(self.samples)
+
+    @property
+    def synced(self):
+        return len(self.samples) > 0
+
+    @property
+    def offset(self):
+        samples = self.snapshot()
+        return min(samples)[1] if samples else 0.0
+
+    @property
+    def rtt(self):
+        samples = self.snapshot()
+        return min(samples)[0] if samples else None
+
+    @property
+    def jitter(self):
+        """standard deviation of the round trip times"""
+        return self.__jitter(self.snapshot())
+
+    @staticmethod
+    def __jitter(samples):
+        if len(samples) < 2:
+            return None
+        rtts = [r for r, _ in samples]
+        mean = sum(rtts) / len(rtts)
+        return math.sqrt(sum((r - mean) ** 2 for r in rtts) / (len(rtts) - 1))
+
+    def to_server_time(self, tc):
+        return tc - self.offset
+
+    def stats(self):
+        samples = self.snapshot()
+        best = min(samples) if samples else (None, 0.0)
+        return {
+            "offset": best[1],
+            "rtt": best[0],
+            "jitter": self.__jitter(samples),
+            "samples": len(samples),
+        }
+
+    def summary(self):
+        stats = self.stats()
+        if not stats["samples"]:
+            return "not synced"
+        text = f"offset {stats['offset'] * 1000:+.1f} ms, rtt {stats['rtt'] * 1000:.1f} ms"
+        if stats["jitter"] is not None:
+            text += f", jitter {stats['jitter'] * 1000:.1f} ms"
+        return text
+
+
+class BuzzLatch(object):
+    """First-buzz latch shared by the network and GUI threads.
+
+    Whoever acquires the lock first while it is open decides the outcome, with
+    no waiting on either side: a buzz that `claim`s it has won, and a `close`
+    that gets it first (the timer running out) means nobody did. It starts
+    closed and is reopened for each round of responses.
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__lock.acquire()
+        self.exclude = None
+
+    @property
+    def is_open(self):
+        return not self.__lock.locked()
+
+    def open(self, exclude=None):
+        self.exclude = exclude
+        try:
+            self.__lock.release()
+        except RuntimeError:
+            pass  # already open
+
+    def claim(self, player):
+        """True if `player` is the first buzz since the latch opened"""
+        if player is self.exclude:
+            return False
+        return self.__lock.acquire(blocking=False)
+
+    def close(self):
+        """True if this closed the latch, False if a buzz had already claimed it"""
+        return self.__lock.acquire(blocking=False)
+
+
+class BuzzArbiter(object):
+    """Picks the first buzz by client time rather than by arrival.
+
+    After responses open, the first buzz to arrive starts an adjudication window;
+    every buzz arriving in the window is collected, and when it closes the one
+    with the earliest corrected timestamp wins. `call_later(delay, f)` schedules
+    the decision and must return a handle accepted by `cancel`.
+    """
+
+    def __init__(self, window, decide, call_later, cancel):
+        self.window = window
+        self.decide = decide
+        self.call_later = call_later
+        self.cancel = cancel
+
+        self.is_open = False
+        self.opened_at = None
+        self.exclude = None
+        self.__buzzes = []
+        self.__handle = None
+
+    def open(self, opened_at, exclude=None):
+        self.close()
+        self.is_open = True
+        self.opened_at = opened_at
+        self.exclude = exclude
+
+    @property
+    def pending(self):
+        """a window is open and its winner not yet decided"""
+        return self.__handle is not None
+
+    def close(self):
+        if self.__handle is not None:
+            self.cancel(self.__handle)
+            self.__handle = None
+        self.is_open = False
+        self.__buzzes = []
+
+    def buzz(self, player, t):
+        if not self.is_open or player is self.exclude:
+            return
+        if any(p is player for _, _, p in self.__buzzes):
+            return
+
+        # a stamp slightly before opening is clock error, not an early buzz
+        t = max(t, self.opened_at)
+        self.__buzzes.append((t, len(self.__buzzes), player))
+        if self.__handle is None:
+            self.__handle = self.call_later(self.window, self.__decide)
+
+    def __decide(self):
+        self.__handle = None
+        if not self.__buzzes:
+            return
+        t, _, winner = min(self.__buzzes, key=lambda b: b[:2])
+        logging.info(
+            "arbitrated %d buzzes, winner %s at %.4f s",
+            len(self.__buzzes),
+            winner,
+            t - self.opened_at,
+        )
+        self.close()
+        self.decide(winner)
@@ -0,0 +1,78 @@
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtCore import Qt, QSize
+
+from base64 import b64decode
+from collections import OrderedDict
+
+from jparty.utils import resource_path
+
+
+SCALED_CACHE_SIZE = 256
+
+_pixmaps = {}
+_scaled = OrderedDict()
+
+
+def pixmap(name):
+    """the image `name` from the data folder, decoded once per process"""
+    p = _pixmaps.get(name)
+    if p is None:
+        p = QPixmap(resource_path(name))
+        _pixmaps[name] = p
+    return p
+
+
+def _scaled_cached(key, source, size, aspect, transform, dpr):
+    key += (dpr,)
+    p = _scaled.get(key)
+    if p is not None:
+        _scaled.move_to_end(key)
+        return p
+
+    # scaled to device pixels, so high-DPI screens don't upscale it again
+    p = source().scaled(size * dpr, aspect, transform)
+    p.setDevicePixelRatio(dpr)
+    _scaled[key] = p
+    if len(_scaled) > SCALED_CACHE_SIZE:
+        _scaled.popitem(last=False)
+    return p
+
+
+def scaled_pixmap(
+    name,
+    size,
+    aspect=Qt.AspectRatioMode.IgnoreAspectRatio,
+    transform=Qt.TransformationMode.SmoothTransformation,
+    dpr=1.0,
+):
+    """`pixmap(name)` scaled to `size`, cached so painting at an unchanged size is
+    a plain blit. `size` is in logical pixels; pass the widget's
+    devicePixelRatioF() as `dpr` to render at the screen's resolution. A resize
+    just asks for a new key; the least recently used sizes are dropped once
+    more than SCALED_CACHE_SIZE are held."""
+    size = QSize(size)
+    key = (name, size.width(), size.height(), aspect, transform)
+    return _scaled_cached(key, lambda: pixmap(name), size, aspect, transform, dpr)
+
+
+def signature_pixmap(url):
+    """a player's drawn name, from the PNG data URL the controller stored"""
+    p = QPixmap()
+    p.loadFromData(b64decode(url.partition(",")[2]), "PNG")
+    return p
+
+
+def scaled_signature(
+    url,
+    size,
+    aspect=Qt.AspectRatioMode.IgnoreAspectRatio,
+    transform=Qt.TransformationMode.SmoothTransformation,
+    dpr=1.0,
+):
+    """a drawn name scaled to `size`, sharing scaled_pixmap's cache, so every
+    podium and the winner screen at the same height reuse one scaling"""
+    size = QSize(size)
+    key = (url, size.width(), size.height(), aspect, transform)
+    return _scaled_cached(
+        key, lambda: signature_pixmap(url), size, aspect, transform, dpr
+    )
@@ -0,0 +1,88 @@
+import simpleaudio as sa
+
+import time
+import logging
+from collections import deque
+
+from jparty.utils import resource_path
+from jparty.scheduler import timer_service
+from jparty.metrics import SAMPLE_HISTORY
+
+
+SOUNDS = ("intro.wav", "final.wav", "dd.wav", "stumped.wav")
+
+
+class SoundBank(object):
+    """every sound effect, read and decoded once at startup into shared buffers"""
+
+    def __init__(self, names=SOUNDS):
+        self.__waves = {
+            name: sa.WaveObject.from_wave_file(resource_path(name)) for name in names
+        }
+
+    def __getitem__(self, name):
+        return self.__waves[name]
+
+    def duration(self, name):
+        w = self.__waves[name]
+        frame_size = w.num_channels * w.bytes_per_sample
+        return len(w.audio_data) / (frame_size * w.sample_rate)
+
+
+class Mixer(object):
+    """Plays sounds from a SoundBank.
+
+    By default a sound restarts if it is played while already playing; pass
+    `overlap=True` to layer it instead. Looping sounds are re-queued on the
+    TimerService when each pass ends, so nothing blocks waiting for playback.
+    The time the last SAMPLE_HISTORY playbacks took to start is kept in
+    `latencies`.
+    """
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.__playing = {}  # name -> list of PlayObjects
+        self.__loops = {}  # name -> ScheduledCall for the next pass
+        self.latencies = deque(maxlen=SAMPLE_HISTORY)
+
+    def play(self, name, loop=False, overlap=False):
+        if not overlap:
+            self.stop(name)
+
+        start = time.perf_counter()
+        play_obj = self.bank[name].play()
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        logging.debug("started %s in %.2f ms", name, latency * 1000)
+
+        playing = [p for p in self.__playing.get(name, []) if p.is_playing()]
+        playing.append(play_obj)
+        self.__playing[name] = playing
+
+        if loop:
+            # an overlapping play replaces the loop already running, which
+            # could otherwise never be stopped
+            previous = self.__loops.get(name)
+            if previous is not None:
+                previous.cancel()
+            self.__loops[name] = timer_service().schedule(
+                self.bank.duration(name), self.__repeat, name
+            )
+        return play_obj
+
+    def __repeat(self, name):
+        if name in self.__loops:
+            self.play(name, loop=True)
+
+    def stop(self, name=None):
+        """stop `name`, or every sound if no name is given"""
+        names = list(self.__playing) if name is None else [name]
+        for n in names:
+            call = self.__loops.pop(n, None)
+            if call is not None:
+                call.cancel()
+            for p in self.__playing.pop(n, []):
+                p.stop()
+
+    def is_playing(self, name):
+        return any(p.is_playing() for p in self.__playing.get(name, []))
@@ -2,7 +2,7 @@ from PyQt6.QtWidgets import QWidget, QGridLayout
 from PyQt6.QtGui import QPalette
 
 
-from jparty.game import Board
+from jparty.engine import Board
 from jparty.style import MyLabel, CARDPAL, JBLUE, DARKBLUE
 
 
@@ -142,6 +142,9 @@ class BoardWidget(QWidget):
                     q = round.get_question(x, y - 1)
                     gl.itemAtPosition(y, x).widget().question = q
 
+    def question_card(self, i, j):
+        return self.grid_layout.itemAtPosition(j + 1, i).widget()
+
     def resizeEvent(self, event):
         self.grid_layout.setSpacing(self.width() // 150)
 
@@ -3,9 +3,8 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PyQt6.QtCore import Qt, QSize
 
 
-from jparty.utils import resource_path
-import time
-from threading import Thread, current_thread
+from jparty.assets import scaled_pixmap
+from jparty.scheduler import Timeline
 
 
 class Borders(object):
@@ -13,6 +12,13 @@ class Borders(object):
         super().__init__()
         self.left = self.create_widget(parent, -1)
         self.right = self.create_widget(parent, 1)
+        self.__flash = Timeline(
+            [
+                (0.0, lambda: self.lights(False)),
+                (0.2, lambda: self.lights(True)),
+                (0.4, lambda: self.lights(False)),
+            ]
+        )
 
     def __iter__(self):
         return iter([self.left, self.right])
@@ -20,16 +26,8 @@ class Borders(object):
     def create_widget(self, parent, d):
         return BorderWidget(parent, d)
 
-    def __flash(self):
-        self.lights(False)
-        time.sleep(0.2)
-        self.lights(True)
-        time.sleep(0.2)
-        self.lights(False)
-
     def flash(self):
-        self.__flash_thread = Thread(target=self.__flash, name="flash")
-        self.__flash_thread.start()
+        self.__flash.start()
 
     def lights(self, val):
         for b in self:
@@ -39,53 +37,42 @@ class Borders(object):
 class HostBorders(Borders):
     def __init__(self, parent):
         super().__init__(parent)
-        self.__active_thread = None
+        self.__hints = {key: self.__hint_timeline(key) for key in ("space", "arrow")}
 
     def create_widget(self, parent, d):
         return HostBorderWidget(parent, d)
 
-    def __flash_hints(self, key):
-        while self.__active_thread == current_thread():
+    def __hint_timeline(self, key):
+        def show():
             for b in self:
                 b.show_hints(key)
-            time.sleep(0.5)
+
+        def hide():
             for b in self:
-               b.hide_hints(key)
-            time.sleep(0.5)
+                b.hide_hints(key)
 
-    def buzz_hint(self):
-        self.__buzz_hint_thread = Thread(target=self.__buzz_hint, name="buzz_hint")
-        self.__buzz_hint_thread.start()
+        return Timeline([(0.0, show), (0.5, hide)], loop=True, period=1.0)
+
+    def __flash_hints(self, key, val):
+        # only one hint blinks at a time
+        for timeline in self.__hints.values():
+            timeline.stop()
+
+        if val:
+            self.__hints[key].start()
+        else:
+            for b in self:
+                b.hide_hints(key)
 
     def arrowhints(self, val):
         for b in self:
             b.colors = val
             b.update()
 
-        if val:
-            self.__active_thread = Thread(
-                target=self.__flash_hints, args=("arrow",), name="arrow_hints"
-            )
-            self.__active_thread.start()
-        else:
-            self.__active_thread = None
-            for b in self:
-                b.hide_hints("arrow")
+        self.__flash_hints("arrow", val)
 
     def spacehints(self, val):
-        if val:
-            self.__active_thread = Thread(
-                target=self.__flash_hints, args=("space",), name="space_hints"
-            )
-            self.__active_thread.start()
-        else:
-            self.__active_thread = None
-            for b in self:
-                b.hide_hints("space")
-
-    def closeEvent(self, event):
-        super().closeEvent(event)
-        self.__active_hint = None
+        self.__flash_hints("space", val)
 
 
 class BorderWidget(QWidget):
@@ -120,10 +107,8 @@ class HostBorderWidget(BorderWidget):
         self.setLayout(self.layout)
 
         self.__hint_images = {
-            "space": QPixmap(resource_path("space.png")),
-            "arrow": QPixmap(
-                resource_path(("right" if d == 1 else "left") + "-arrow.png")
-            ),
+            "space": "space.png",
+            "arrow": ("right" if d == 1 else "left") + "-arrow.png",
         }
 
         self.colors = False
@@ -131,10 +116,11 @@ class HostBorderWidget(BorderWidget):
 
     def show_hints(self, key):
         self.hint_label.setPixmap(
-            self.__hint_images[key].scaled(
+            scaled_pixmap(
+                self.__hint_images[key],
                 self.size() * 0.9,
                 Qt.AspectRatioMode.KeepAspectRatio,
-                transformMode=Qt.TransformationMode.SmoothTransformation,
+                dpr=self.devicePixelRatioF(),
             )
         )
 
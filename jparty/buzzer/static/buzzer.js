@@ -6,9 +6,41 @@ function sleep(ms) {
 
 var last_buzz = new Date().getTime();
 
+// binary protocol, see controller.py
+const OP_BUZZ = 0x01;
+const OP_SYNC = 0x02;
+const OP_SYNC_REPLY = 0x03;
+var binary_protocol = false;
+
+// high resolution wall clock in seconds, for the server's clock sync
+function client_now() {
+    return (performance.timeOrigin + performance.now()) / 1000;
+}
+
+function on_binary(buffer) {
+    var view = new DataView(buffer);
+    switch (view.getUint8(0)) {
+        case OP_SYNC:
+            var reply = new DataView(new ArrayBuffer(17));
+            reply.setUint8(0, OP_SYNC_REPLY);
+            reply.setFloat64(1, view.getFloat64(1));
+            reply.setFloat64(9, client_now());
+            updater.socket.send(reply.buffer);
+            break;
+    }
+}
+
 async function buzz() {
+    var pressed = client_now();
     if (!$("#buzzer").prop("disabled")) {
-        send("BUZZ");
+        if (binary_protocol) {
+            var frame = new DataView(new ArrayBuffer(9));
+            frame.setUint8(0, OP_BUZZ);
+            frame.setFloat64(1, pressed);
+            updater.socket.send(frame.buffer);
+        } else {
+            send("BUZZ");
+        }
         $("#buzzer").prop("disabled", true);
 
         setTimeout(function () {
@@ -110,6 +142,10 @@ $(document).ready(function() {
     if (!window.console) window.console = {};
     if (!window.console.log) window.console.log = function() {};
 
+    var cookie = getToken();
+    if (cookie != "") {
+        console.log("checking token "+cookie)
+    }
     updater.start();
 
     const canvas = document.querySelector("canvas");
@@ -124,13 +160,7 @@ $(document).ready(function() {
     window.addEventListener("resize", resizeCanvas);
     // resizeCanvas();
 
-    var cookie = getToken();
-    if (cookie != "") {
-        console.log("checking token "+cookie)
-        updater.socket.onopen = function (event) {
-            updater.socket.send(JSON.stringify({message:"CHECK_IF_EXISTS", text:cookie}));
-        };
-    } else {
+    if (cookie == "") {
         console.log("no cookie")
         load_page("name");
         resizeCanvas();
@@ -172,14 +202,37 @@ $(document).ready(function() {
 
 var updater = {
     socket: null,
+    retry_delay: 500,
 
     start: function() {
         var url = "ws://" + location.host + "/buzzersocket";
         updater.socket = new WebSocket(url);
-        updater.socket.onclose = function(event) { location.reload(true); };
+        updater.socket.binaryType = "arraybuffer";
+        updater.socket.onopen = function (event) {
+            updater.retry_delay = 500;
+            send("PROTOCOL", "binary");
+            var token = getToken();
+            if (token != "") {
+                send("CHECK_IF_EXISTS", token);
+            }
+        };
+        // reconnect with jittered backoff rather than reloading the page, so
+        // a Wi-Fi blip doesn't bring every phone back at the same moment
+        updater.socket.onclose = function(event) {
+            var delay = updater.retry_delay * (0.5 + Math.random());
+            updater.retry_delay = Math.min(updater.retry_delay * 2, 10000);
+            setTimeout(updater.start, delay);
+        };
         updater.socket.onmessage = function(event) {
+            if (event.data instanceof ArrayBuffer) {
+                on_binary(event.data);
+                return;
+            }
             jsondata = JSON.parse(event.data);
             switch (jsondata.message) {
+                case "PROTOCOL":
+                    binary_protocol = (jsondata.text == "binary");
+                    break;
                 case "GAMEFULL":
                     alert("Game has too many players!")
                     window.location.reload()
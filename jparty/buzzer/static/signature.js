@@ -0,0 +1,99 @@
+// A small signature pad for the name page, served with the rest of the buzzer
+// so the page works on a LAN with no internet. It implements the part of the
+// signature_pad API that buzzer.js uses: clear, isEmpty, toData, fromData and
+// toDataURL, with strokes stored as lists of points in CSS pixels.
+
+function SignaturePad(canvas, options) {
+    options = options || {};
+    this.canvas = canvas;
+    this.penColor = options.penColor || "black";
+    this.backgroundColor = options.backgroundColor || "rgba(0,0,0,0)";
+    this.penWidth = options.penWidth || 2.5;
+    this._strokes = [];
+    this._stroke = null;
+
+    canvas.style.touchAction = "none";  // drawing shouldn't scroll the page
+
+    var pad = this;
+    canvas.addEventListener("pointerdown", function (event) {
+        if (event.button !== 0) {
+            return;
+        }
+        canvas.setPointerCapture(event.pointerId);
+        pad._stroke = [pad._point(event)];
+        pad._strokes.push(pad._stroke);
+        pad._drawStroke(pad._stroke);
+    });
+    canvas.addEventListener("pointermove", function (event) {
+        if (pad._stroke === null) {
+            return;
+        }
+        pad._stroke.push(pad._point(event));
+        pad._drawStroke(pad._stroke.slice(-2));
+    });
+    var end = function () {
+        pad._stroke = null;
+    };
+    canvas.addEventListener("pointerup", end);
+    canvas.addEventListener("pointercancel", end);
+
+    this.clear();
+}
+
+SignaturePad.prototype._point = function (event) {
+    var rect = this.canvas.getBoundingClientRect();
+    return {x: event.clientX - rect.left, y: event.clientY - rect.top};
+};
+
+SignaturePad.prototype._drawStroke = function (points) {
+    var ctx = this.canvas.getContext("2d");
+    ctx.strokeStyle = this.penColor;
+    ctx.fillStyle = this.penColor;
+    ctx.lineWidth = this.penWidth;
+    ctx.lineCap = "round";
+    ctx.lineJoin = "round";
+    if (points.length === 1) {
+        ctx.beginPath();
+        ctx.arc(points[0].x, points[0].y, this.penWidth / 2, 0, 2 * Math.PI);
+        ctx.fill();
+        return;
+    }
+    ctx.beginPath();
+    ctx.moveTo(points[0].x, points[0].y);
+    for (var i = 1; i < points.length; i++) {
+        ctx.lineTo(points[i].x, points[i].y);
+    }
+    ctx.stroke();
+};
+
+SignaturePad.prototype.clear = function () {
+    var ctx = this.canvas.getContext("2d");
+    ctx.save();
+    ctx.setTransform(1, 0, 0, 1, 0, 0);
+    ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+    ctx.fillStyle = this.backgroundColor;
+    ctx.fillRect(0, 0, this.canvas.width, this.canvas.height);
+    ctx.restore();
+    this._strokes = [];
+    this._stroke = null;
+};
+
+SignaturePad.prototype.isEmpty = function () {
+    return this._strokes.length === 0;
+};
+
+SignaturePad.prototype.toData = function () {
+    return this._strokes;
+};
+
+SignaturePad.prototype.fromData = function (strokes) {
+    this.clear();
+    for (var i = 0; i < strokes.length; i++) {
+        this._drawStroke(strokes[i]);
+    }
+    this._strokes = strokes;
+};
+
+SignaturePad.prototype.toDataURL = function () {
+    return this.canvas.toDataURL("image/png");
+};
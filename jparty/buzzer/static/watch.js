@@ -0,0 +1,111 @@
+// read-only spectator page; state arrives on channels, see SpectatorBroadcaster
+
+var roster = [];
+var scores = [];
+
+function player_name(i) {
+    var name = roster[i];
+    if (name === undefined) {
+        return document.createTextNode("");
+    }
+    if (name.startsWith("data:image")) {
+        var img = document.createElement("img");
+        img.src = name;
+        img.className = "watch-signature";
+        return img;
+    }
+    return document.createTextNode(name);
+}
+
+function render_scores() {
+    var board = document.getElementById("scores");
+    board.replaceChildren();
+    for (var i = 0; i < roster.length; i++) {
+        var podium = document.createElement("div");
+        podium.className = "watch-podium";
+        var name = document.createElement("div");
+        name.appendChild(player_name(i));
+        var score = document.createElement("div");
+        var value = scores[i] || 0;
+        score.textContent = "$" + value.toLocaleString();
+        score.className = value < 0 ? "watch-score negative" : "watch-score";
+        podium.appendChild(name);
+        podium.appendChild(score);
+        board.appendChild(podium);
+    }
+}
+
+function render_clue(clue) {
+    var category = document.getElementById("clue-category");
+    var value = document.getElementById("clue-value");
+    var text = document.getElementById("clue-text");
+    if (clue === null) {
+        category.textContent = "";
+        value.textContent = "";
+        text.textContent = "";
+        return;
+    }
+    category.textContent = clue.category;
+    if (clue.dd && clue.text === null) {
+        value.textContent = "Daily Double!";
+    } else if (clue.value > 0) {
+        value.textContent = "$" + clue.value.toLocaleString();
+    } else {
+        value.textContent = "";
+    }
+    text.textContent = clue.text === null ? "" : clue.text;
+}
+
+function render_reveal(reveal) {
+    var div = document.getElementById("reveal");
+    div.replaceChildren();
+    if (reveal === null) {
+        return;
+    }
+    if (reveal.winners !== undefined) {
+        div.appendChild(document.createTextNode(reveal.winners.length == 1 ? "Winner: " : "Tie: "));
+        reveal.winners.forEach(function (i) { div.appendChild(player_name(i)); });
+        return;
+    }
+    div.appendChild(player_name(reveal.player));
+    var answer = document.createElement("div");
+    answer.textContent = reveal.answer;
+    div.appendChild(answer);
+    if (reveal.wager !== null) {
+        var wager = document.createElement("div");
+        wager.textContent = "$" + reveal.wager.toLocaleString();
+        div.appendChild(wager);
+    }
+}
+
+var retry_delay = 500;
+
+function connect() {
+    var socket = new WebSocket("ws://" + location.host + "/spectatorsocket");
+    socket.onopen = function (event) { retry_delay = 500; };
+    socket.onclose = function (event) {
+        setTimeout(connect, retry_delay * (0.5 + Math.random()));
+        retry_delay = Math.min(retry_delay * 2, 10000);
+    };
+    socket.onmessage = function (event) {
+        var data = JSON.parse(event.data);
+        switch (data.message) {
+            case "ROSTER":
+                roster = data.text;
+                render_scores();
+                break;
+            case "SCORES":
+                scores = data.text;
+                render_scores();
+                break;
+            case "CLUE":
+                render_clue(data.text);
+                break;
+            case "REVEAL":
+                render_reveal(data.text);
+                break;
+        }
+    };
+}
+
+document.addEventListener("DOMContentLoaded", connect);
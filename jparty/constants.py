@@ -3,3 +3,27 @@ QUESTIONTIME = 4
 MONIES = [[200, 400, 600, 800, 1000], [400, 800, 1200, 1600, 2000]]
 MAXPLAYERS = 8
 PORT = 8080
+LIBRARY_TTL = 30 * 24 * 3600  # seconds before a cached J-Archive game is refetched
+GSHEET_TTL = 3600  # custom games get edited, so keep them for less time
+LIBRARY_MAX_BYTES = 64 * 1024 * 1024
+LOAD_DEBOUNCE = 0.3  # seconds of typing pause before a game id is fetched
+LOAD_TIMEOUT = 10
+RANDOM_POOL_SIZE = 3  # parsed, valid games kept ready for the Random button
+RANDOM_POOL_DRAWS = 5  # J-Archive random picks tried before giving up on finding a new game
+RANDOM_POOL_HISTORY = 200  # recently tried ids the random pool will not pick again
+ANIMATION_FPS = 30
+ARBITRATION_WINDOW = 0.1  # seconds after the first buzz during which earlier-stamped buzzes can still win
+SYNC_INTERVAL = 2  # seconds between clock sync probes to each buzzer
+SYNC_BURST = 5  # quick probes sent right after a buzzer connects
+RECONNECT_GRACE = 10  # seconds a player who drops out of the lobby has to come back
+OUTBOX_LIMIT = 64  # unsent messages a buzzer may fall behind by before it is dropped
+SPECTATOR_CHUNK = 50  # spectator sockets written between yields to the IOLoop
+SPECTATOR_PING_INTERVAL = 10
+PING_TIMEOUT = 30  # seconds without a pong before a buzzer is dropped
+SIGNATURE_MAX_BYTES = 1024 * 1024  # longest drawn-name data URL accepted at sign-in
+SIGNATURE_MAX_PIXELS = 4096 * 4096  # refuse to decode anything larger than this
+SIGNATURE_HEIGHT = 300  # signatures are stored no taller than this, in pixels
+LOG_MAX_BYTES = 5 * 1024 * 1024  # a session's log rotates at this size
+LOG_BACKUPS = 2  # rotated parts kept per session
+LOG_SESSIONS = 10  # sessions whose logs are kept
+EVENT_HISTORY = 500  # recent structured events kept in memory for crash reports
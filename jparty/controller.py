@@ -2,42 +2,427 @@ import logging
 import tornado.escape
 import tornado.ioloop
 import tornado.web
+import tornado.template
 import tornado.websocket
 from tornado.options import define, options
 
 import os
-from threading import Thread
+import time
+import asyncio
+import gzip
+import struct
+import base64
+import hashlib
+import binascii
+import mimetypes
+from dataclasses import dataclass
+from threading import Thread, Lock
+from collections import deque
 import socket
 
+try:
+    import brotli  # optional: phones that accept br get smaller assets
+except ImportError:
+    brotli = None
+
+from PyQt6.QtGui import QImage, QImageReader
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QSize
+
 from jparty.environ import root
-from jparty.game import Player
-from jparty.constants import MAXPLAYERS, PORT
+from jparty.engine import Player
+from jparty.arbitration import ClockEstimator, BuzzArbiter, BuzzLatch
+from jparty.metrics import metrics, RTT
+from jparty.journal import event
+from jparty.constants import (
+    MAXPLAYERS,
+    PORT,
+    ARBITRATION_WINDOW,
+    SYNC_INTERVAL,
+    SYNC_BURST,
+    RECONNECT_GRACE,
+    OUTBOX_LIMIT,
+    SPECTATOR_CHUNK,
+    SPECTATOR_PING_INTERVAL,
+    PING_TIMEOUT,
+    SIGNATURE_MAX_BYTES,
+    SIGNATURE_MAX_PIXELS,
+    SIGNATURE_HEIGHT,
+)
+
+
+@dataclass(frozen=True)
+class TransportProfile:
+    """Websocket settings suited to one kind of network.
+
+    Compression is permessage-deflate options, or None for none. Tornado
+    negotiates it per connection, not per frame, so it is chosen separately for
+    the player sockets (small frames, apart from a signature at sign-in) and the
+    spectator sockets (which carry every signature in the roster). Players are
+    pinged every `ping_active` seconds while a clue is up, to keep the host's
+    Wi-Fi card out of power saving when buzzes matter, and every `ping_idle`
+    seconds otherwise.
+    """
+
+    player_compression: dict = None
+    spectator_compression: dict = None
+    ping_active: float = 0.19
+    ping_idle: float = 2.0
+
+
+DEFLATE = {"compression_level": 1, "mem_level": 5}
+
+TRANSPORT_PROFILES = {
+    "lan": TransportProfile(),
+    "wan": TransportProfile(DEFLATE, DEFLATE, ping_active=0.5, ping_idle=5.0),
+    "signatures": TransportProfile(None, DEFLATE),
+    "low_power": TransportProfile(ping_active=1.0, ping_idle=10.0),
+}
 
 
 define("port", default=PORT, help="run on the given port", type=int)
+define(
+    "fair_buzz",
+    default=True,
+    help="judge buzzes by corrected client timestamps rather than arrival order",
+    type=bool,
+)
+define(
+    "transport",
+    default="lan",
+    help=f"websocket transport profile: {', '.join(TRANSPORT_PROFILES)}",
+    type=str,
+)
+
+# Binary protocol: once a client has negotiated it with a PROTOCOL message,
+# hot-path messages are sent as binary frames whose first byte is an opcode.
+# Times are float64 seconds, big-endian: the server's on its monotonic clock,
+# the client's on its own.
+PROTOCOL_BINARY = "binary"
+OP_BUZZ = 0x01  # client -> server, optionally followed by the press time
+OP_SYNC = 0x02  # server -> client, followed by the server time
+OP_SYNC_REPLY = 0x03  # client -> server, the echoed server time then the client time
+
+BUZZ_FRAME = struct.Struct(">Bd")
+SYNC_FRAME = struct.Struct(">Bd")
+SYNC_REPLY_FRAME = struct.Struct(">Bdd")
+
+
+# messages that carry a whole state, so a newer one replaces any still unsent
+COALESCED = {"EXISTS", "PROMPTWAGER", "PROMPTANSWER"}
+
+
+def encode(msg, text=""):
+    return tornado.escape.json_encode({"message": msg, "text": text})
+
+
+SIGNATURE_PREFIX = "data:image/png;base64,"
+
+
+def normalize_signature(name):
+    """Validate a drawn name and re-encode it at display size, or return None.
+
+    This runs once, on the IOLoop thread, as the player signs in, so the
+    displays and the spectator roster only ever handle a small PNG. The image
+    header is checked before anything is decoded, and a large drawing is
+    downsampled as it is read.
+    """
+    if len(name) > SIGNATURE_MAX_BYTES:
+        return None
+    try:
+        data = base64.b64decode(name[len(SIGNATURE_PREFIX) :], validate=True)
+    except binascii.Error:
+        return None
+
+    source = QBuffer()
+    source.setData(QByteArray(data))
+    source.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(source, b"png")
+    size = reader.size()
+    if not size.isValid() or size.width() * size.height() > SIGNATURE_MAX_PIXELS:
+        return None
+    if size.height() > SIGNATURE_HEIGHT:
+        width = round(size.width() * SIGNATURE_HEIGHT / size.height())
+        reader.setScaledSize(QSize(max(width, 1), SIGNATURE_HEIGHT))
+    image = reader.read()
+    if image.isNull():
+        return None
+
+    # a pen on a flat background: a palette keeps the antialiasing at a
+    # fraction of the size of true colour
+    encoded = QBuffer()
+    encoded.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.convertToFormat(QImage.Format.Format_Indexed8).save(encoded, "PNG")
+    return SIGNATURE_PREFIX + base64.b64encode(bytes(encoded.data())).decode()
+
+
+class Outbox(object):
+    """Outbound queue for one socket, safe to fill from any thread.
+
+    Writes happen on the IOLoop, one at a time: the next message is only handed
+    to the socket once the previous one has been written, so a slow phone backs
+    up here rather than in tornado's buffers. An unsent state message is replaced
+    by a newer one of the same kind, and a client that falls more than
+    OUTBOX_LIMIT messages behind is disconnected; it resumes its state when its
+    page reconnects.
+    """
+
+    def __init__(self, handler, ioloop, limit=OUTBOX_LIMIT):
+        self.handler = handler
+        self.ioloop = ioloop
+        self.limit = limit
+        self.__lock = Lock()
+        self.__queue = deque()  # [key, payload]; key is None if never coalesced
+        self.__draining = False
+
+    def put(self, payload, key=None):
+        with self.__lock:
+            if key is not None:
+                for item in self.__queue:
+                    if item[0] == key:
+                        item[1] = payload
+                        return
+            if len(self.__queue) >= self.limit:
+                logging.warning("client is not keeping up, disconnecting it")
+                self.__queue.clear()
+                self.ioloop.add_callback(self.handler.close)
+                return
+            self.__queue.append([key, payload])
+            if self.__draining:
+                return
+            self.__draining = True
+        self.ioloop.add_callback(self.__drain)
+
+    async def __drain(self):
+        while True:
+            with self.__lock:
+                if not self.__queue:
+                    self.__draining = False
+                    return
+                _, payload = self.__queue.popleft()
+            try:
+                await self.handler.write_message(payload)
+                logging.debug("Sent %s", payload)
+            except tornado.websocket.WebSocketClosedError:
+                with self.__lock:
+                    self.__queue.clear()
+                    self.__draining = False
+                return
+
+
+class SpectatorBroadcaster(object):
+    """Fans game state out to any number of read-only spectator sockets.
+
+    State is published on named channels (roster, scores, clue, reveal). Each
+    update is serialized once and the same payload is written to every socket.
+    A spectator still writing an earlier update is skipped, and sent the newest
+    state of each channel when it catches up, so a slow phone never has more
+    than one write pending. Sockets are visited `chunk` at a time, yielding to
+    the IOLoop in between, so the players' traffic is never stuck behind a
+    large audience.
+    """
+
+    def __init__(self, chunk=SPECTATOR_CHUNK):
+        self.ioloop = None
+        self.chunk = chunk
+        self.sockets = set()
+        self.__channels = {}  # channel -> (version, payload)
+        self.__version = 0
+        self.__fanning_out = False
+
+    def publish(self, channel, data):
+        """may be called from any thread"""
+        payload = encode(channel, data)
+        if self.ioloop is None:
+            self.__update(channel, payload)
+        else:
+            self.ioloop.add_callback(self.__update, channel, payload)
+
+    def __update(self, channel, payload):
+        self.__version += 1
+        self.__channels[channel] = (self.__version, payload)
+        if self.ioloop is not None and not self.__fanning_out:
+            self.__fanning_out = True
+            self.ioloop.add_callback(self.__fan_out)
+
+    async def __fan_out(self):
+        try:
+            while True:
+                version = self.__version
+                sockets = list(self.sockets)
+                for i in range(0, len(sockets), self.chunk):
+                    for ws in sockets[i : i + self.chunk]:
+                        self.catch_up(ws)
+                    await asyncio.sleep(0)
+                if version == self.__version:
+                    return
+        finally:
+            self.__fanning_out = False
+
+    def add(self, ws):
+        self.sockets.add(ws)
+        self.catch_up(ws)
+
+    def remove(self, ws):
+        self.sockets.discard(ws)
+
+    def catch_up(self, ws):
+        """write `ws` every channel it has not seen, unless it is mid-write"""
+        if ws not in self.sockets:
+            return
+        if ws.pending is not None and not ws.pending.done():
+            return
+        stale = sorted(vp for vp in self.__channels.values() if vp[0] > ws.version)
+        if not stale:
+            return
+        ws.version = stale[-1][0]
+        try:
+            for _, payload in stale:
+                ws.pending = ws.write_message(payload)
+        except tornado.websocket.WebSocketClosedError:
+            self.remove(ws)
+            return
+        ws.pending.add_done_callback(lambda f: self.__written(ws, f))
+
+    def __written(self, ws, future):
+        if future.exception() is not None:
+            self.remove(ws)
+        else:
+            self.catch_up(ws)
+
+
+PAGES = ("index.html", "watch.html")  # templates served pre-rendered
 
 
 class Application(tornado.web.Application):
     def __init__(self, controller):
         handlers = [
-            (r"/", WelcomeHandler),
+            (r"/", PageHandler, dict(page="index.html")),
             (r"/play", BuzzerHandler),
             (r"/buzzersocket", BuzzerSocketHandler),
+            (r"/watch", PageHandler, dict(page="watch.html")),
+            (r"/spectatorsocket", SpectatorSocketHandler),
         ]
         settings = dict(
             cookie_secret="",
             template_path=os.path.join(os.path.join(root, "buzzer", "templates")),
             static_path=os.path.join(root, "buzzer", "static"),
+            static_handler_class=AssetHandler,
             xsrf_cookies=False,
-            websocket_ping_interval=0.19,
+            # tornado's default websocket_max_message_size is kept: an oversized
+            # signature is refused by normalize_signature, which sends the
+            # player back to sign in, rather than dropping the socket silently
         )
+        AssetHandler.load(settings["static_path"])
         super(Application, self).__init__(handlers, **settings)
         self.controller = controller
+        self.pages = self.render_pages(PAGES)
+
+    def render_pages(self, names):
+        """Render the templates once; they only depend on the static files'
+        versions, which are fixed for the life of the server."""
+        loader = tornado.template.Loader(self.settings["template_path"])
+
+        def static_url(path):
+            return AssetHandler.make_static_url(self.settings, path)
+
+        return {
+            name: Asset(
+                loader.load(name).generate(static_url=static_url),
+                "text/html; charset=UTF-8",
+            )
+            for name in names
+        }
+
+
+class Asset(object):
+    """A response held in memory along with its compressed copies, made once
+    when it is loaded: gzip, and brotli too when the brotli module is
+    installed. A copy that isn't smaller than the body is not kept."""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.version = hashlib.md5(body).hexdigest()
+        self.encoded = {}  # content encoding -> body, best first
+        if brotli is not None:
+            self.add_encoding("br", brotli.compress(body, quality=11))
+        self.add_encoding("gzip", gzip.compress(body, compresslevel=9, mtime=0))
+
+    def add_encoding(self, encoding, encoded):
+        if len(encoded) < len(self.body):
+            self.encoded[encoding] = encoded
+
+    def serve(self, handler, include_body=True):
+        body, etag = self.body, self.version
+        accept = handler.request.headers.get("Accept-Encoding", "")
+        accepted = {e.split(";")[0].strip() for e in accept.split(",")}
+        for encoding, encoded in self.encoded.items():
+            if encoding in accepted:
+                handler.set_header("Content-Encoding", encoding)
+                body, etag = encoded, f"{etag}-{encoding}"
+                break
+
+        handler.set_header("Content-Type", self.content_type)
+        handler.set_header("Vary", "Accept-Encoding")
+        handler.set_header("Etag", f'"{etag}"')
+        if handler.check_etag_header():
+            handler.clear_header("Content-Encoding")
+            handler.set_status(304)
+            return
+        handler.set_header("Content-Length", len(body))
+        if include_body:
+            handler.write(body)
+
+
+class AssetHandler(tornado.web.StaticFileHandler):
+    """Serves the buzzer's static files from memory, read and compressed once
+    at startup.
+    static_url() links carry the content hash, so a versioned request is cached
+    by the phone for good and a reload after a Wi-Fi blip only has to
+    revalidate the page itself."""
 
+    assets = {}  # path under the static folder -> Asset
+
+    @classmethod
+    def load(cls, static_path):
+        for dirpath, _, filenames in os.walk(static_path):
+            for filename in filenames:
+                abspath = os.path.join(dirpath, filename)
+                path = os.path.relpath(abspath, static_path).replace(os.sep, "/")
+                content_type, _ = mimetypes.guess_type(abspath)
+                with open(abspath, "rb") as f:
+                    cls.assets[path] = Asset(
+                        f.read(), content_type or "application/octet-stream"
+                    )
+
+    @classmethod
+    def get_version(cls, settings, path):
+        asset = cls.assets.get(path)
+        if asset is None:
+            return super().get_version(settings, path)
+        return asset.version
+
+    def get(self, path, include_body=True):
+        asset = self.assets.get(self.parse_url_path(path))
+        if asset is None:
+            raise tornado.web.HTTPError(404)
+        if self.get_query_argument("v", None) == asset.version:
+            self.set_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.set_header("Cache-Control", "no-cache")
+        asset.serve(self, include_body)
+
+
+class PageHandler(tornado.web.RequestHandler):
+    """one of the pre-rendered pages; always revalidated, so phones pick up new
+    asset versions"""
+
+    def initialize(self, page):
+        self.page = page
 
-class WelcomeHandler(tornado.web.RequestHandler):
     def get(self):
-        self.render("index.html", messages=BuzzerSocketHandler.cache)
+        self.set_header("Cache-Control", "no-cache")
+        self.application.pages[self.page].serve(self)
 
 
 class BuzzerHandler(tornado.web.RequestHandler):
@@ -46,7 +431,7 @@ class BuzzerHandler(tornado.web.RequestHandler):
             self.set_cookie("test", "test_val")
             logging.info("set cookie")
         else:
-            logging.info(f"cookie: {self.get_cookie('test')}")
+            logging.info("cookie: %s", self.get_cookie("test"))
         self.render("play.html", messages=BuzzerSocketHandler.cache)
 
 
@@ -58,21 +443,44 @@ class BuzzerSocketHandler(tornado.websocket.WebSocketHandler):
         # self.name = None
         self.controller = self.application.controller
         self.player = None
+        self.binary = False
+        self.opcodes = {OP_BUZZ: self.on_buzz_frame, OP_SYNC_REPLY: self.on_sync_reply}
+        self.clock = ClockEstimator()
+        self.sync_callback = None
+        self.ping_sent = None  # monotonic time of the unanswered keepalive ping
+        self.outbox = Outbox(self, tornado.ioloop.IOLoop.current())
 
     def get_compression_options(self):
-        # Non-None enables compression with default options.
-        return {}
+        return self.controller.profile.player_compression
+
+    def keepalive(self, now):
+        """ping, unless the last ping is still unanswered; drop the socket if
+        it has been unanswered for PING_TIMEOUT seconds"""
+        if self.ping_sent is not None:
+            if now - self.ping_sent > PING_TIMEOUT:
+                logging.info("%s stopped answering pings", self.player)
+                self.close()
+            return
+        try:
+            self.ping()
+            self.ping_sent = now
+        except tornado.websocket.WebSocketClosedError:
+            pass
 
     def open(self):
         self.set_nodelay(True)
 
+    def on_pong(self, data):
+        if self.ping_sent is not None:
+            metrics.record(self.player, RTT, (time.monotonic() - self.ping_sent) * 1000)
+            self.ping_sent = None
+
     def send(self, msg, text=""):
-        data = {"message": msg, "text": text}
-        try:
-            self.write_message(data)
-            logging.info(f"Sent {data}")
-        except:
-            logging.error(f"Error sending message {msg}", exc_info=True)
+        """queue a message for this client; may be called from any thread"""
+        self.send_payload(encode(msg, text), msg)
+
+    def send_payload(self, payload, msg):
+        self.outbox.put(payload, msg if msg in COALESCED else None)
 
     def check_if_exists(self, token):
 
@@ -81,16 +489,20 @@ class BuzzerSocketHandler(tornado.websocket.WebSocketHandler):
             logging.info("NEW")
             self.send("NEW")
         else:
-            logging.info(f"Reconnected {p}")
+            logging.info("Reconnected %s", p)
             self.player = p
-            p.connected = True
-            p.waiter = self
+            self.controller.resume(p, self)
             self.send("EXISTS", tornado.escape.json_encode(p.state()))
 
     def on_message(self, message):
         # do this first to kill latency
-        if "BUZZ" in message:
-            self.buzz()
+        arrived = time.monotonic()
+        if isinstance(message, bytes):
+            self.on_binary_message(message, arrived)
+            return
+        # only short frames can be a buzz; a signature's base64 may contain "BUZZ"
+        if len(message) < 64 and "BUZZ" in message:
+            self.buzz(arrived=arrived)
             return
         parsed = tornado.escape.json_decode(message)
         msg = parsed["message"]
@@ -98,16 +510,69 @@ class BuzzerSocketHandler(tornado.websocket.WebSocketHandler):
         if msg == "NAME":
             self.init_player(text)
         elif msg == "CHECK_IF_EXISTS":
-            logging.info(f"Checking if {text} exists")
+            logging.info("Checking if %s exists", text)
             self.check_if_exists(text)
         elif msg == "WAGER":
             self.wager(text)
         elif msg == "ANSWER":
             self.application.controller.answer(self.player, text)
+        elif msg == "PROTOCOL":
+            self.negotiate(text)
 
         else:
             raise Exception("Unknown message")
 
+    def on_binary_message(self, message, arrived):
+        if not self.binary or len(message) == 0:
+            logging.error("Unexpected binary message")
+            return
+        handler = self.opcodes.get(message[0])
+        if handler is None:
+            logging.error("Unknown opcode %s", message[0])
+            return
+        handler(message, arrived)
+
+    def on_buzz_frame(self, message, arrived):
+        stamp = None
+        if len(message) >= BUZZ_FRAME.size:
+            _, stamp = BUZZ_FRAME.unpack_from(message)
+        self.buzz(stamp, arrived)
+
+    def on_sync_reply(self, message, arrived):
+        if len(message) < SYNC_REPLY_FRAME.size:
+            logging.error("Short sync reply")
+            return
+        _, t0, tc = SYNC_REPLY_FRAME.unpack_from(message)
+        self.clock.add_sample(t0, tc, arrived)
+
+    def send_sync(self):
+        # written directly, not queued: the probe has to leave when it is stamped
+        try:
+            self.write_message(SYNC_FRAME.pack(OP_SYNC, time.monotonic()), binary=True)
+        except tornado.websocket.WebSocketClosedError:
+            self.stop_sync()
+
+    def start_sync(self):
+        ioloop = tornado.ioloop.IOLoop.current()
+        for i in range(SYNC_BURST):
+            ioloop.call_later(i * 0.2, self.send_sync)
+        self.sync_callback = tornado.ioloop.PeriodicCallback(
+            self.send_sync, SYNC_INTERVAL * 1000
+        )
+        self.sync_callback.start()
+
+    def stop_sync(self):
+        if self.sync_callback is not None:
+            self.sync_callback.stop()
+            self.sync_callback = None
+
+    def negotiate(self, protocol):
+        if protocol == PROTOCOL_BINARY:
+            self.binary = True
+            self.send("PROTOCOL", PROTOCOL_BINARY)
+            if self.sync_callback is None:
+                self.start_sync()
+
     def init_player(self, name):
 
         if not self.controller.accepting_players:
@@ -119,15 +584,25 @@ class BuzzerSocketHandler(tornado.websocket.WebSocketHandler):
             self.send("FULL")
             return
 
+        if name.startswith(SIGNATURE_PREFIX):
+            name = normalize_signature(name)
+            if name is None:
+                logging.warning("Rejected signature from %s", self.request.remote_ip)
+                self.send("NEW")
+                return
+
         self.player = Player(name, self)
         self.application.controller.new_player(self.player)
         logging.info(
-            f"New Player: {self.player} {self.request.remote_ip} {self.player.token.hex()}"
+            "New Player: %s %s %s",
+            self.player,
+            self.request.remote_ip,
+            self.player.token.hex(),
         )
         self.send("TOKEN", self.player.token.hex())
 
-    def buzz(self):
-        self.application.controller.buzz(self.player)
+    def buzz(self, stamp=None, arrived=None):
+        self.application.controller.buzz(self.player, stamp, arrived)
 
     def wager(self, text):
         self.application.controller.wager(self.player, int(text))
@@ -137,20 +612,70 @@ class BuzzerSocketHandler(tornado.websocket.WebSocketHandler):
         self.send("TOOLATE")
 
     def on_close(self):
+        self.stop_sync()
+        self.ping_sent = None
+        if self.player is not None and self.player.waiter is self:
+            self.controller.disconnected(self.player)
+
+
+class SpectatorSocketHandler(tornado.websocket.WebSocketHandler):
+    """read-only socket receiving game state from the SpectatorBroadcaster"""
+
+    def initialize(self):
+        self.broadcaster = self.application.controller.spectators
+        self.version = 0  # newest broadcast version written to this socket
+        self.pending = None  # future of the last write
+
+    @property
+    def ping_interval(self):
+        # the players' fast keepalive would cost hundreds of frames a second here
+        return SPECTATOR_PING_INTERVAL
+
+    def get_compression_options(self):
+        # Deflating each update once per socket multiplies its CPU and memory
+        # cost by the audience size, on the thread the buzzes arrive on, so only
+        # profiles for slow links turn it on.
+        return self.application.controller.profile.spectator_compression
+
+    def open(self):
+        self.set_nodelay(True)
+        self.broadcaster.add(self)
+
+    def on_message(self, message):
         pass
 
+    def on_close(self):
+        self.broadcaster.remove(self)
+
 
 class BuzzerController:
-    def __init__(self, game):
+    def __init__(self, game, profile=None):
         self.thread = None
         self.game = game
         tornado.options.parse_command_line()
-        self.app = Application(
-            self
-        )  # this is to remove sleep mode on Macbook network card
+        if profile is None:
+            if options.transport not in TRANSPORT_PROFILES:
+                raise ValueError(f"unknown transport profile {options.transport}")
+            profile = TRANSPORT_PROFILES[options.transport]
+        self.profile = profile
+        self.app = Application(self)
         self.port = options.port
         self.connected_players = []
+        self.players_by_token = {}  # token hex, as stored in the buzzer cookie
+        self.__ghosts = {}  # token hex -> timeout removing a player who left the lobby
         self.accepting_players = True
+        self.ioloop = None
+        self.keepalive = None
+        self.active = False  # a clue is up, so keep the network awake
+        self.__ticks = 0
+        self.spectators = SpectatorBroadcaster()
+        self.latch = BuzzLatch()
+        self.arbiter = BuzzArbiter(
+            ARBITRATION_WINDOW,
+            self.__buzz_won,
+            lambda delay, f: self.ioloop.call_later(delay, f),
+            lambda handle: self.ioloop.remove_timeout(handle),
+        )
 
     def start(self, threaded=True, tries=0):
         try:
@@ -162,26 +687,98 @@ class BuzzerController:
             self.start(threaded, tries+1)
             return
 
+        self.ioloop = tornado.ioloop.IOLoop.current()
+        self.spectators.ioloop = self.ioloop
+        self.keepalive = tornado.ioloop.PeriodicCallback(
+            self.__keepalive, self.profile.ping_active * 1000
+        )
+        self.ioloop.add_callback(self.keepalive.start)
         if threaded:
-            self.thread = Thread(target=tornado.ioloop.IOLoop.current().start)
+            self.thread = Thread(target=self.ioloop.start)
             self.thread.setDaemon(True)
             self.thread.start()
         else:
-            tornado.ioloop.IOLoop.current().start()
+            self.ioloop.start()
 
     def restart(self):
         for p in self.connected_players:
             p.waiter.close()
         self.connected_players = []
+        self.players_by_token = {}
         self.accepting_players = True
+        self.close_buzzers()
 
-    def buzz(self, player):
-        if self.game:
-            i_player = self.game.players.index(player)
-            self.game.buzz_trigger.emit(i_player)
+    def set_active(self, active):
+        """ping players every ping_active seconds while `active`, else every ping_idle"""
+        self.active = active
+
+    def __keepalive(self):
+        self.__ticks += 1
+        every = max(1, round(self.profile.ping_idle / self.profile.ping_active))
+        if not self.active and self.__ticks % every:
+            return
+        now = time.monotonic()
+        for p in list(self.connected_players):
+            # a closed socket stays the waiter until the player reconnects
+            if p.waiter is not None and p.waiter.ws_connection is not None:
+                p.waiter.keepalive(now)
+
+    def open_buzzers(self, exclude=None):
+        """called from the Qt thread when responses open; `exclude` may not buzz"""
+        opened_at = time.monotonic()
+        if self.ioloop is not None:
+            self.ioloop.add_callback(self.__open_buzzers, opened_at, exclude)
+
+    def __open_buzzers(self, opened_at, exclude):
+        self.arbiter.open(opened_at, exclude)
+        self.latch.open(exclude)
+
+    def close_buzzers(self):
+        """Called from the Qt thread. Returns False if a buzz won the latch
+        first, in which case its notification is already on its way (after
+        the arbitration window, if one is open)."""
+        closed = self.latch.close()
+        if closed and self.ioloop is not None:
+            self.ioloop.add_callback(self.arbiter.close)
+        return closed
+
+    def buzz_time(self, player, stamp, arrived):
+        """when `player` pressed their buzzer, on the server clock"""
+        clock = player.waiter.clock
+        if stamp is None or not clock.synced:
+            return arrived
+        # never later than arrival, and never so early that a bad clock (or a
+        # forged stamp) could beat buzzes that arrived a whole window before it
+        t = clock.to_server_time(stamp)
+        return min(max(t, arrived - self.arbiter.window), arrived)
+
+    def buzz(self, player, stamp=None, arrived=None):
+        """decide the buzz here on the IOLoop thread; Qt only hears the outcome"""
+        if player is None:
+            return
+        if not self.latch.is_open and not self.arbiter.pending:
+            self.game.buzz_hint_trigger.emit(player)
+            return
+        if arrived is None:
+            arrived = time.monotonic()
+        event("buzz", player=player.token.hex()[:6], stamp=stamp, arrived=arrived)
+        if options.fair_buzz:
+            # The first buzz in claims the latch for its window, so the timer
+            # running out meanwhile can't discard a buzz that arrived in time;
+            # the window then decides which of the buzzes it collected won.
+            if not self.arbiter.pending and not self.latch.claim(player):
+                return
+            self.arbiter.buzz(player, self.buzz_time(player, stamp, arrived))
         else:
-            i_player = self.connected_players.index(player)
-            self.game.buzz_hint_trigger.emit(i_player)
+            self.accept_buzz(player)
+
+    def accept_buzz(self, player):
+        if self.latch.claim(player):
+            self.__buzz_won(player)
+
+    def __buzz_won(self, player):
+        self.game.buzz_trigger.emit(player, time.monotonic())
+        event("buzz_won", player=player.token.hex()[:6])
 
     def wager(self, player, amount):
         i_player = self.game.players.index(player)
@@ -194,8 +791,41 @@ class BuzzerController:
 
     def new_player(self, player):
         self.connected_players.append(player)
+        self.players_by_token[player.token.hex()] = player
         self.game.new_player_trigger.emit()
 
+    def remove_player(self, player):
+        self.connected_players.remove(player)
+        self.players_by_token.pop(player.token.hex(), None)
+
+    def resume(self, player, waiter):
+        """hand `player` to a new socket; their state and podium are untouched"""
+        handle = self.__ghosts.pop(player.token.hex(), None)
+        if handle is not None:
+            self.ioloop.remove_timeout(handle)
+        player.waiter = waiter
+        player.connected = True
+
+    def disconnected(self, player):
+        """Called on the IOLoop thread when a player's socket closes. Players
+        keep their place for good once the game starts; in the lobby, one who
+        does not come back within RECONNECT_GRACE seconds is removed."""
+        player.connected = False
+        if self.accepting_players and self.ioloop is not None:
+            self.__ghosts[player.token.hex()] = self.ioloop.call_later(
+                RECONNECT_GRACE, self.__remove_ghost, player
+            )
+
+    def __remove_ghost(self, player):
+        self.__ghosts.pop(player.token.hex(), None)
+        if (
+            not player.connected
+            and self.accepting_players
+            and self.players_by_token.get(player.token.hex()) is player
+        ):
+            logging.info("Removing disconnected player %s", player)
+            self.game.remove_player_trigger.emit(player)
+
     @classmethod
     def localip(self):
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -210,12 +840,7 @@ class BuzzerController:
             return f"{localip}:{self.port}"
 
     def player_with_token(self, token):
-        for p in self.connected_players:
-            logging.info(f"{p.token}, {token}")
-            if p.token.hex() == token:
-                logging.info("MATCH")
-                return p
-        return None
+        return self.players_by_token.get(token)
 
     def open_wagers(self, players=None):
         if players is None:
@@ -225,11 +850,18 @@ class BuzzerController:
             p.waiter.send("PROMPTWAGER", str(max(p.score, 0)))
             p.page = "wager"
 
+    def broadcast(self, msg, text="", players=None):
+        """send the same message to every player, serialized only once"""
+        if players is None:
+            players = self.connected_players
+        payload = encode(msg, text)
+        for p in players:
+            p.waiter.send_payload(payload, msg)
+
     def prompt_answers(self):
         for p in self.connected_players:
-            p.waiter.send("PROMPTANSWER")
             p.page = "answer"
+        self.broadcast("PROMPTANSWER")
 
     def toolate(self):
-        for p in self.connected_players:
-            p.waiter.send("TOOLATE")
+        self.broadcast("TOOLATE")
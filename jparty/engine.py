@@ -0,0 +1,797 @@
+"""The rules of the game, without Qt.
+
+Engine holds the game state and rule logic: round progression, scoring, daily
+doubles, Final Jeopardy judgement and the host's keystrokes. It reports what
+happened through `engine.events`, and the Qt displays (see game.py) subscribe to
+those events to draw it. With no subscribers it runs headless, which is what
+the simulator below uses:
+
+    python -m jparty.engine --games 1000 --players 3
+
+It plays on the order of a thousand games a second on one core.
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+from dataclasses import dataclass
+from functools import partial
+
+from jparty.constants import FJTIME, QUESTIONTIME
+
+
+# key codes, equal to the corresponding Qt.Key values
+KEY_SPACE = 0x20
+KEY_LEFT = 0x01000012
+KEY_RIGHT = 0x01000014
+
+
+# checked before the logging calls made on every keystroke, which otherwise
+# cost more than handling the keystroke does
+verbose = partial(logging.root.isEnabledFor, logging.INFO)
+
+
+@dataclass
+class KeystrokeEvent:
+    key: int
+    func: callable
+    hint_setter: callable = None
+    active: bool = False
+    persistent: bool = False
+
+
+class KeystrokeManager(object):
+    def __init__(self):
+        super().__init__()
+        self.__events = {}
+        self.__order = {}  # ident -> registration order, the order events are called in
+        self.__active = {}  # key -> {ident: event}, so a keypress only sees active events
+
+    def addEvent(
+        self, ident, key, func, hint_setter=None, active=False, persistent=False
+    ):
+        old = self.__events.get(ident)
+        if old is not None:
+            self.__active.get(old.key, {}).pop(ident, None)
+        event = KeystrokeEvent(key, func, hint_setter, active, persistent)
+        self.__events[ident] = event
+        self.__order.setdefault(ident, len(self.__order))
+        if active:
+            self.__active.setdefault(key, {})[ident] = event
+
+    def call(self, key):
+        """this is split in to two for loops so one execution doesnt cause another event to trigger"""
+        active = self.__active.get(key)
+        if not active:
+            return
+        idents = sorted(active, key=self.__order.get) if len(active) > 1 else list(active)
+
+        events_to_call = []
+        for ident in idents:
+            event = active[ident]
+            if verbose():
+                logging.info("Calling %s", ident)
+            events_to_call.append(event)
+            if not event.persistent:
+                self._deactivate(ident)
+
+        for event in events_to_call:
+            event.func()
+
+    def _activate(self, ident):
+        if verbose():
+            logging.info("Activating %s", ident)
+        e = self.__events[ident]
+        e.active = True
+        self.__active.setdefault(e.key, {})[ident] = e
+        if e.hint_setter:
+            e.hint_setter(True)
+
+    def _deactivate(self, ident):
+        e = self.__events[ident]
+        if not e.active:
+            return  # its hint went out when it was deactivated
+        e.active = False
+        del self.__active[e.key][ident]
+        if e.hint_setter:
+            e.hint_setter(False)
+
+    def activate(self, *idents):
+        for ident in idents:
+            self._activate(ident)
+
+    def deactivate(self, *idents):
+        for ident in idents:
+            self._deactivate(ident)
+
+
+@dataclass(slots=True)
+class Question:
+    index: tuple
+    text: str
+    answer: str
+    category: str
+    value: int = -1
+    dd: bool = False
+    complete: bool = False
+
+
+class Board(object):
+    """Questions are kept in a column-major grid indexed by (category, row), along
+    with a running count and dollar total of the clues left on the board."""
+
+    size = (6, 5)
+
+    def __init__(self, categories, questions, dj=False, size=None):
+        self.categories = categories
+        self.dj = dj
+        if size is not None:
+            self.size = size
+        if not questions is None:
+            self.questions = questions
+        else:
+            self.questions = []
+
+        width, height = self.size
+        self.__grid = [None] * (width * height)
+        self.__values = [0] * (width * height)
+        self.remaining = 0
+        self.remaining_value = 0
+        for q in self.questions:
+            slot = self.__slot(*q.index)
+            if slot is None:
+                logging.warning("question %s is off the board", q.index)
+                continue
+            self.__grid[slot] = q
+            if not q.complete:
+                self.__values[slot] = max(q.value, 0)
+                self.remaining += 1
+                self.remaining_value += self.__values[slot]
+
+    def __slot(self, i, j):
+        width, height = self.size
+        if 0 <= i < width and 0 <= j < height:
+            return i * height + j
+        return None
+
+    def get_question(self, i, j):
+        slot = self.__slot(i, j)
+        return None if slot is None else self.__grid[slot]
+
+    def complete_question(self, q):
+        """mark `q` as played and update the remaining totals"""
+        if q.complete:
+            return
+        q.complete = True
+        slot = self.__slot(*q.index)
+        if slot is not None and self.__grid[slot] is q:
+            self.remaining -= 1
+            self.remaining_value -= self.__values[slot]
+
+    def finished(self):
+        return self.remaining == 0
+
+    def complete(self):
+        return all(q is not None for q in self.__grid)
+
+
+class FinalBoard(Board):
+    size = (1, 1)
+
+    def __init__(self, category, question):
+        super().__init__([category], [question], dj=False)
+        self.category = category
+        self.question = question
+
+
+@dataclass
+class GameData:
+    rounds: list
+    date: str
+    comments: str
+
+    def complete(self):
+        return all(b.complete() for b in self.rounds)
+
+
+class Player(object):
+    def __init__(self, name, waiter):
+        self.name = name
+        self.token = os.urandom(15)
+        self.connected = True
+        self.score = 0
+        self.waiter = waiter
+        self.wager = None
+        self.finalanswer = ""
+        self.page = "buzz"
+
+    def __hash__(self):
+        return int.from_bytes(self.token, sys.byteorder)
+
+    def state(self):
+        return {"page": self.page, "score": self.score}
+
+
+class Events(object):
+    """Synchronous publish/subscribe: `emit` calls every handler connected to
+    the event, in the order they were connected, on the caller's thread."""
+
+    def __init__(self):
+        self.__handlers = {}
+
+    def connect(self, event, handler):
+        self.__handlers.setdefault(event, []).append(handler)
+
+    def disconnect(self, event, handler):
+        self.__handlers.get(event, []).remove(handler)
+
+    def emit(self, event, *args):
+        handlers = self.__handlers.get(event)
+        if handlers:
+            for handler in handlers:
+                handler(*args)
+
+
+class ManualTimer(object):
+    """A QuestionTimer stand-in that only runs out when `expire` is called."""
+
+    def __init__(self, interval, f, *args, **kwargs):
+        self.interval = interval
+        self.f = f
+        self.args = args
+        self.kwargs = kwargs
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def resume(self):
+        self.running = True
+
+    def pause(self):
+        self.running = False
+
+    def cancel(self):
+        self.running = False
+
+    def expire(self):
+        if self.running:
+            self.running = False
+            self.f(*self.args, **self.kwargs)
+
+
+class NullBuzzers(object):
+    """The BuzzerController interface the engine drives, with no players'
+    phones attached. A closed latch always belongs to the caller."""
+
+    accepting_players = True
+
+    def open_buzzers(self, exclude=None):
+        pass
+
+    def close_buzzers(self):
+        return True
+
+    def set_active(self, active):
+        pass
+
+    def open_wagers(self, players=None):
+        pass
+
+    def prompt_answers(self):
+        pass
+
+    def toolate(self):
+        pass
+
+    def remove_player(self, player):
+        pass
+
+    def restart(self):
+        self.accepting_players = True
+
+
+class Engine(object):
+    """The state and rules of one game.
+
+    `buzzers` is the BuzzerController (or NullBuzzers), and `timer(interval, f)`
+    makes the pausable countdowns for clues and Final Jeopardy. Everything the
+    displays need to show is emitted on `events`:
+
+        begin, game_started(round), round_started(round), players_changed,
+        question_loaded(q), daily_double_wagered(q), responses_opened,
+        responses_closed, buzzed(player), buzz_hint(player), answer_given(player),
+        stumped, back_to_board, score_changed(player), final_started(q),
+        wager_received(player), final_wagers_in, final_revealed,
+        final_responses_opened, final_time_up, final_judgement_started,
+        final_player(player), final_answer_shown(player, answer),
+        final_wager_shown(player, wager), game_over(winners), game_closed,
+        arrow_hints(on), space_hints(on), state(channel, data)
+
+    `state` carries the public view of the game (the ROSTER, SCORES, CLUE and
+    REVEAL channels) for the spectator page.
+    """
+
+    def __init__(self, buzzers=None, timer=ManualTimer):
+        self.buzzers = buzzers if buzzers is not None else NullBuzzers()
+        self.timer_factory = timer
+        self.events = Events()
+        self.emit = self.events.emit
+
+        self.data = None
+
+        self.current_round = None
+        self.players = []
+
+        self.active_question = None
+        self.accepting_responses = False
+        self.answering_player = None
+        self.previous_answerer = None
+        self.timer = None
+        self.soliciting_player = False  # part of selecting who found a daily double
+
+        self.__judgement_round = 0
+        self.__sorted_players = None
+        self.__shown_answer = None
+
+        self.keystroke_manager = KeystrokeManager()
+
+        self.keystroke_manager.addEvent(
+            "CORRECT_ANSWER", KEY_LEFT, self.correct_answer, self.arrowhints
+        )
+        self.keystroke_manager.addEvent(
+            "INCORRECT_ANSWER", KEY_RIGHT, self.incorrect_answer, self.arrowhints
+        )
+        self.keystroke_manager.addEvent(
+            "BACK_TO_BOARD", KEY_SPACE, self.back_to_board, self.spacehints
+        )
+        self.keystroke_manager.addEvent(
+            "OPEN_RESPONSES", KEY_SPACE, self.open_responses, self.spacehints
+        )
+        self.keystroke_manager.addEvent(
+            "NEXT_ROUND", KEY_SPACE, self.next_round, self.spacehints
+        )
+        self.keystroke_manager.addEvent(
+            "OPEN_FINAL", KEY_SPACE, self.open_final, self.spacehints
+        )
+        self.keystroke_manager.addEvent(
+            "CLOSE_GAME", KEY_SPACE, self.close_game, self.spacehints
+        )
+        self.keystroke_manager.addEvent(
+            "FINAL_OPEN_RESPONSES",
+            KEY_SPACE,
+            self.final_open_responses,
+            self.spacehints,
+        )
+        self.keystroke_manager.addEvent(
+            "FINAL_NEXT_PLAYER",
+            KEY_SPACE,
+            self.final_next_player,
+            self.spacehints,
+        )
+        self.keystroke_manager.addEvent(
+            "FINAL_SHOW_ANSWER",
+            KEY_SPACE,
+            self.final_show_answer,
+            self.spacehints,
+        )
+        self.keystroke_manager.addEvent(
+            "FINAL_CORRECT_ANSWER",
+            KEY_LEFT,
+            self.final_correct_answer,
+            self.arrowhints,
+        )
+        self.keystroke_manager.addEvent(
+            "FINAL_INCORRECT_ANSWER",
+            KEY_RIGHT,
+            self.final_incorrect_answer,
+            self.arrowhints,
+        )
+
+    def key(self, key):
+        """the host pressed `key`"""
+        self.keystroke_manager.call(key)
+
+    def arrowhints(self, val):
+        self.emit("arrow_hints", val)
+
+    def spacehints(self, val):
+        self.emit("space_hints", val)
+
+    def valid_game(self):
+        return self.data is not None and self.data.complete()
+
+    def startable(self):
+        return self.valid_game() and len(self.players) > 0
+
+    def begin(self):
+        self.emit("begin")
+
+    def start_game(self):
+        self.current_round = self.data.rounds[0]
+        self.buzzers.accepting_players = False
+        self.emit("game_started", self.current_round)
+
+    def set_players(self, players):
+        self.players = players
+        self.publish_players()
+        self.emit("players_changed")
+
+    def remove_player(self, player):
+        if player not in self.players:
+            return False
+        self.buzzers.remove_player(player)
+        if player in self.players:
+            self.players.remove(player)
+        self.publish_players()
+        self.emit("players_changed")
+        return True
+
+    def open_responses(self):
+        self.emit("responses_opened")
+        self.accepting_responses = True
+        self.buzzers.open_buzzers(self.previous_answerer)
+
+        if not self.timer:
+            self.timer = self.timer_factory(QUESTIONTIME, self.stumped)
+
+        self.timer.start()
+
+    def close_responses(self):
+        if not self.buzzers.close_buzzers():
+            return  # a buzz got in first and is being delivered
+        self.timer.pause()
+        self.accepting_responses = False
+        self.emit("responses_closed")
+
+    def buzz(self, player):
+        """`player` won the buzz; returns False if responses weren't open to them"""
+        if not self.accepting_responses or player is self.previous_answerer:
+            return False
+        self.accepting_responses = False
+        self.timer.pause()
+        self.previous_answerer = player
+        self.answering_player = player
+        self.emit("buzzed", player)
+        self.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
+        return True
+
+    def buzz_hint(self, player):
+        if self.active_question is None and player in self.players:
+            self.emit("buzz_hint", player)
+
+    def answer_given(self):
+        self.keystroke_manager.deactivate("CORRECT_ANSWER", "INCORRECT_ANSWER")
+        self.emit("answer_given", self.answering_player)
+        self.answering_player = None
+
+    def back_to_board(self):
+        if verbose():
+            logging.info("back_to_board")
+        self.emit("back_to_board")
+        self.buzzers.set_active(False)
+        self.publish_clue(None)
+        self.timer = None
+        self.current_round.complete_question(self.active_question)
+        self.active_question = None
+        self.previous_answerer = None
+        if self.current_round.finished():
+            logging.info("NEXT ROUND")
+            self.keystroke_manager.activate("NEXT_ROUND")
+
+    def next_round(self):
+        logging.info("next round")
+        i = self.data.rounds.index(self.current_round)
+        logging.info("ROUND %d", i)
+        self.current_round = self.data.rounds[i + 1]
+
+        if isinstance(self.current_round, FinalBoard):
+            self.publish_clue(self.current_round.question, show_text=False)
+            self.start_final()
+        else:
+            self.emit("round_started", self.current_round)
+
+    def start_final(self):
+        logging.info("start final")
+        self.emit("final_started", self.current_round.question)
+        self.buzzers.open_wagers()
+
+    def wager(self, player, amount):
+        """a Final Jeopardy wager"""
+        player.wager = amount
+        self.emit("wager_received", player)
+        logging.info("%s wagered %s", player, amount)
+        if all(p.wager is not None for p in self.players):
+            self.emit("final_wagers_in")
+            self.keystroke_manager.activate("OPEN_FINAL")
+
+    def answer(self, player, guess):
+        player.finalanswer = guess
+        logging.info("%s guessed %s", player, guess)
+
+    def final_open_responses(self):
+        self.emit("final_responses_opened")
+        self.buzzers.prompt_answers()
+
+        self.timer = self.timer_factory(FJTIME, self.final_finished_song)
+        self.timer.start()
+
+    def final_next_player(self):
+        if self.__judgement_round == 0:
+            self.emit("final_judgement_started")
+            self.__sorted_players = sorted(self.players, key=lambda x: x.score)
+
+        elif self.__judgement_round == len(self.players):
+            self.end_game()
+            return
+
+        self.answering_player = self.__sorted_players[self.__judgement_round]
+        self.emit("final_player", self.answering_player)
+        self.keystroke_manager.activate("FINAL_SHOW_ANSWER")
+
+    def final_show_answer(self):
+        answer = self.answering_player.finalanswer
+        if answer == "":
+            answer = "________"
+
+        self.__shown_answer = answer
+        self.emit("final_answer_shown", self.answering_player, answer)
+        self.publish_reveal(answer=answer)
+        self.keystroke_manager.activate(
+            "FINAL_CORRECT_ANSWER", "FINAL_INCORRECT_ANSWER"
+        )
+
+    def final_correct_answer(self):
+        ap = self.answering_player
+        self.set_score(ap, ap.score + ap.wager)
+        self.final_judgement_given()
+
+    def final_incorrect_answer(self):
+        ap = self.answering_player
+        self.set_score(ap, ap.score - ap.wager)
+        self.final_judgement_given()
+
+    def final_judgement_given(self):
+        self.keystroke_manager.deactivate(
+            "FINAL_CORRECT_ANSWER", "FINAL_INCORRECT_ANSWER"
+        )
+        self.emit("final_wager_shown", self.answering_player, self.answering_player.wager)
+        self.publish_reveal(
+            answer=self.__shown_answer,
+            wager=self.answering_player.wager,
+        )
+        self.keystroke_manager.activate("FINAL_NEXT_PLAYER")
+        self.__judgement_round += 1
+
+    def final_finished_song(self):
+        logging.info("Final song ended")
+        self.buzzers.toolate()
+        self.accepting_responses = False
+        self.emit("final_time_up")
+        self.keystroke_manager.activate("FINAL_NEXT_PLAYER")
+
+    def winners(self):
+        top_score = max([p.score for p in self.players])
+        return [p for p in self.players if p.score == top_score]
+
+    def end_game(self):
+        winners = self.winners()
+        self.spectate("REVEAL", {"winners": [self.players.index(w) for w in winners]})
+        self.emit("game_over", winners)
+        self.keystroke_manager.activate("CLOSE_GAME")
+
+    def close_game(self):
+        self.buzzers.restart()
+        self.players = []
+        self.current_round = None
+        self.answering_player = None
+        self.timer = None
+        self.data = None
+        self.__judgement_round = 0
+        self.spectate("CLUE", None)
+        self.spectate("REVEAL", None)
+        self.publish_players()
+        self.emit("game_closed")
+        self.begin()
+
+    def max_dd_wager(self, player):
+        return max(player.score, 1000)
+
+    def daily_double_wager(self, player, wager):
+        """`player` found the daily double and wagered `wager`"""
+        self.answering_player = player
+        self.soliciting_player = False
+        self.active_question.value = wager
+
+        self.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
+        self.emit("daily_double_wagered", self.active_question)
+        self.publish_clue(self.active_question)
+
+    def load_question(self, q):
+        self.active_question = q
+        self.buzzers.set_active(True)
+        if q.dd:
+            logging.info("Daily double!")
+            self.soliciting_player = True
+        else:
+            self.keystroke_manager.activate("OPEN_RESPONSES")
+        self.emit("question_loaded", q)
+        self.publish_clue(q, show_text=not q.dd)
+
+    def open_final(self):
+        self.emit("final_revealed")
+        self.publish_clue(self.current_round.question)
+        self.keystroke_manager.activate("FINAL_OPEN_RESPONSES")
+
+    def correct_answer(self):
+        if self.timer:
+            self.timer.cancel()
+
+        self.set_score(
+            self.answering_player,
+            self.answering_player.score + self.active_question.value,
+        )
+        self.answer_given()
+        self.back_to_board()
+
+    def incorrect_answer(self):
+        self.set_score(
+            self.answering_player,
+            self.answering_player.score - self.active_question.value,
+        )
+        self.answer_given()
+        if self.active_question.dd:
+            self.back_to_board()
+        else:
+            self.open_responses()
+            self.timer.resume()
+
+    def stumped(self):
+        if not self.buzzers.close_buzzers():
+            return  # a buzz beat the timer and is being delivered
+        self.accepting_responses = False
+        self.emit("stumped")
+        self.keystroke_manager.activate("BACK_TO_BOARD")
+
+    def set_score(self, player, score):
+        player.score = score
+        self.emit("score_changed", player)
+        self.publish_scores()
+
+    def spectate(self, channel, data):
+        self.emit("state", channel, data)
+
+    def publish_players(self):
+        self.spectate("ROSTER", [p.name for p in self.players])
+        self.publish_scores()
+
+    def publish_scores(self):
+        self.spectate("SCORES", [p.score for p in self.players])
+
+    def publish_clue(self, q, show_text=True):
+        if q is None:
+            self.spectate("CLUE", None)
+            return
+        self.spectate(
+            "CLUE",
+            {
+                "category": q.category,
+                "value": q.value,
+                "text": q.text if show_text else None,
+                "dd": q.dd,
+            },
+        )
+
+    def publish_reveal(self, answer, wager=None):
+        """a Final Jeopardy answer (and then wager) as the host reveals it"""
+        self.spectate(
+            "REVEAL",
+            {
+                "player": self.players.index(self.answering_player),
+                "answer": answer,
+                "wager": wager,
+            },
+        )
+
+
+def random_game(rng):
+    """a complete two-round game of placeholder clues with the usual daily doubles"""
+    rounds = []
+    for r, n_dd in ((1, 1), (2, 2)):
+        width, height = Board.size
+        dds = set(rng.sample(range(width * height), n_dd))
+        questions = [
+            Question(
+                (i, j),
+                f"clue {i},{j}",
+                f"answer {i},{j}",
+                f"category {i}",
+                200 * r * (j + 1),
+                i * height + j in dds,
+            )
+            for i in range(width)
+            for j in range(height)
+        ]
+        categories = [f"category {i}" for i in range(width)]
+        rounds.append(Board(categories, questions, dj=r == 2))
+    final = Question((0, 0), "final clue", "final answer", "final category")
+    rounds.append(FinalBoard("final category", final))
+    return GameData(rounds, "simulated", "")
+
+
+def simulate(engine, players, data, rng):
+    """Play one game through `engine` the way a host and players would, by
+    keystrokes, buzzes and timers running out. Returns the winners."""
+    engine.data = data
+    engine.set_players(players)
+    engine.start_game()
+
+    while not isinstance(engine.current_round, FinalBoard):
+        board = engine.current_round
+        for q in board.questions:
+            engine.load_question(q)
+            if q.dd:
+                player = rng.choice(players)
+                engine.daily_double_wager(
+                    player, rng.randint(0, engine.max_dd_wager(player))
+                )
+                engine.key(rng.choice((KEY_LEFT, KEY_RIGHT)))
+                continue
+
+            engine.key(KEY_SPACE)  # OPEN_RESPONSES
+            while engine.active_question is q:
+                eligible = [p for p in players if p is not engine.previous_answerer]
+                if rng.random() < 0.2 or not eligible:
+                    engine.timer.expire()  # nobody buzzed
+                    engine.key(KEY_SPACE)  # BACK_TO_BOARD
+                else:
+                    engine.buzz(rng.choice(eligible))
+                    engine.key(KEY_LEFT if rng.random() < 0.6 else KEY_RIGHT)
+        engine.key(KEY_SPACE)  # NEXT_ROUND
+
+    for p in players:
+        engine.wager(p, rng.randint(0, max(p.score, 0)))
+    engine.key(KEY_SPACE)  # OPEN_FINAL
+    engine.key(KEY_SPACE)  # FINAL_OPEN_RESPONSES
+    for p in players:
+        engine.answer(p, rng.choice(("", "what is an answer")))
+    engine.timer.expire()
+
+    for _ in players:
+        engine.key(KEY_SPACE)  # FINAL_NEXT_PLAYER
+        engine.key(KEY_SPACE)  # FINAL_SHOW_ANSWER
+        engine.key(rng.choice((KEY_LEFT, KEY_RIGHT)))
+    engine.key(KEY_SPACE)  # FINAL_NEXT_PLAYER, ending the game
+    winners = engine.winners()
+    engine.key(KEY_SPACE)  # CLOSE_GAME
+    return winners
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate games without a display")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # the engine logs every step of every game
+    rng = random.Random(args.seed)
+    engine = Engine()
+    ties = 0
+    start = time.perf_counter()
+    for _ in range(args.games):
+        players = [Player(f"player {i}", None) for i in range(args.players)]
+        if len(simulate(engine, players, random_game(rng), rng)) > 1:
+            ties += 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.games} games in {elapsed:.2f} s ({args.games / elapsed:.0f} games/s),"
+        f" {ties} ties"
+    )
+
+
+if __name__ == "__main__":
+    main()
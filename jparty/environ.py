@@ -1,6 +1,10 @@
 import sys
+import os
 
 if getattr(sys, "frozen", False):
     root = getattr(sys, "_MEIPASS", ".")  # os.path.dirname(sys.executable)
 else:
     root = ""
+
+# persistent per-user data (game library, etc.); root is a temp dir when frozen
+userdir = os.path.join(os.path.expanduser("~"), ".jparty")
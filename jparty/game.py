@@ -2,175 +2,26 @@ from PyQt6.QtCore import Qt, QObject, pyqtSignal
 from PyQt6.QtWidgets import QInputDialog, QApplication
 
 
-import threading
 import time
-from dataclasses import dataclass
-import os
-import sys
-import simpleaudio as sa
-from collections.abc import Iterable
-import logging
 
-from jparty.utils import SongPlayer, resource_path, CompoundObject
-from jparty.constants import FJTIME, QUESTIONTIME
-
-
-class QuestionTimer(object):
-    def __init__(self, interval, f, *args, **kwargs):
-        super().__init__()
-        self.f = f
-        self.args = args
-        self.kwargs = kwargs
-        self.interval = interval
-        self.__thread = None
-        self.__start_time = None
-        self.__elapsed_time = 0
-
-    def run(self, i):
-        thread = self.__thread
-        time.sleep(i)
-        if thread == self.__thread:
-            self.f(*self.args, **self.kwargs)
-
-    def start(self):
-        """wrapper for resume"""
-        self.resume()
-
-    def cancel(self):
-        """wrapper for pause"""
-        self.pause()
-
-    def pause(self):
-        self.__thread = None
-        self.__elapsed_time += time.time() - self.__start_time
-
-    def resume(self):
-        self.__thread = threading.Thread(
-            target=self.run, args=(self.interval - self.__elapsed_time,)
-        )
-        self.__thread.start()
-        self.__start_time = time.time()
-
-
-@dataclass
-class KeystrokeEvent:
-    key: int
-    func: callable
-    hint_setter: callable = None
-    active: bool = False
-    persistent: bool = False
-
-
-class KeystrokeManager(object):
-    def __init__(self):
-        super().__init__()
-        self.__events = {}
-
-    def addEvent(
-        self, ident, key, func, hint_setter=None, active=False, persistent=False
-    ):
-        self.__events[ident] = KeystrokeEvent(
-            key, func, hint_setter, active, persistent
-        )
-
-    def call(self, key):
-        """this is split in to two for loops so one execution doesnt cause another event to trigger"""
-        events_to_call = []
-        for ident, event in self.__events.items():
-            if event.active and event.key == key:
-                logging.info(f"Calling {ident}")
-                events_to_call.append(event)
-                if not event.persistent:
-                    self._deactivate(ident)
-
-        for event in events_to_call:
-            event.func()
-
-    def _activate(self, ident):
-        logging.info(f"Activating {ident}")
-        e = self.__events[ident]
-        e.active = True
-        e.hint_setter(True)
-        if e.hint_setter:
-            e.hint_setter(True)
-
-    def _deactivate(self, ident):
-        e = self.__events[ident]
-        e.active = False
-        if e.hint_setter:
-            e.hint_setter(False)
-
-    def activate(self, *idents):
-        if isinstance(idents, Iterable):
-            for ident in idents:
-                self._activate(ident)
-        else:
-            self._activate(idents)
-
-    def deactivate(self, *idents):
-        if isinstance(idents, Iterable):
-            for ident in idents:
-                self._deactivate(ident)
-        else:
-            self._deactivate(idents)
-
-
-@dataclass
-class Question:
-    index: tuple
-    text: str
-    answer: str
-    category: str
-    value: int = -1
-    dd: bool = False
-    complete: bool = False
-
-
-class Board(object):
-    size = (6, 5)
-
-    def __init__(self, categories, questions, dj=False):
-        self.categories = categories
-        self.dj = dj
-        if not questions is None:
-            self.questions = questions
-        else:
-            self.questions = []
-
-    def get_question(self, i, j):
-        for q in self.questions:
-            if q.index == (i, j):
-                return q
-        return None
-
-    def complete(self):
-        return len(self.questions) == 30
-
-
-class FinalBoard(Board):
-    size = (1, 1)
-
-    def __init__(self, category, question):
-        super().__init__([category], [question], dj=False)
-        self.category = category
-        self.question = question
-
-    def complete(self):
-        return len(self.questions) == 1
-
-
-@dataclass
-class GameData:
-    rounds: list
-    date: str
-    comments: str
+from jparty.utils import CompoundObject
+from jparty.audio import SoundBank, Mixer
+from jparty.scheduler import QuestionTimer
+from jparty.metrics import metrics, BUZZ_SIGNAL
+from jparty.journal import event
+from jparty.engine import Engine
 
 
 class Game(QObject):
-    buzz_trigger = pyqtSignal(int)
+    """The Qt side of a game: carries the controller's signals onto the GUI
+    thread, asks the host for daily double wagers, and draws and plays what the
+    Engine reports."""
+
+    buzz_trigger = pyqtSignal(object, float)  # winning Player, monotonic time emitted
+    buzz_hint_trigger = pyqtSignal(object)  # Player buzzing while buzzers are closed
     new_player_trigger = pyqtSignal()
+    remove_player_trigger = pyqtSignal(object)
     wager_trigger = pyqtSignal(int, int)
-    toolate_trigger = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -179,95 +30,107 @@ class Game(QObject):
         self.main_display = None
         self.dc = None
 
-        self.data = None
-
-        self.current_round = None
-        self.players = []
-
-        self.active_question = None
-        self.accepting_responses = False
-        self.answering_player = None
-        self.previous_answerer = None
-        self.timer = None
-        self.soliciting_player = False  # part of selecting who found a daily double
-
-        self.song_player = SongPlayer()
-        self.__judgement_round = 0
-        self.__sorted_players = None
-
+        self.mixer = Mixer(SoundBank())
         self.buzzer_controller = None
+        self.engine = Engine(timer=QuestionTimer)
 
-        self.keystroke_manager = KeystrokeManager()
-
-        self.keystroke_manager.addEvent(
-            "CORRECT_ANSWER", Qt.Key.Key_Left, self.correct_answer, self.arrowhints
-        )
-        self.keystroke_manager.addEvent(
-            "INCORRECT_ANSWER", Qt.Key.Key_Right, self.incorrect_answer, self.arrowhints
-        )
-        self.keystroke_manager.addEvent(
-            "BACK_TO_BOARD", Qt.Key.Key_Space, self.back_to_board, self.spacehints
-        )
-        self.keystroke_manager.addEvent(
-            "OPEN_RESPONSES", Qt.Key.Key_Space, self.open_responses, self.spacehints
-        )
-        self.keystroke_manager.addEvent(
-            "NEXT_ROUND", Qt.Key.Key_Space, self.next_round, self.spacehints
-        )
-        self.keystroke_manager.addEvent(
-            "OPEN_FINAL", Qt.Key.Key_Space, self.open_final, self.spacehints
-        )
         self.keystroke_manager.addEvent(
-            "CLOSE_GAME", Qt.Key.Key_Space, self.close_game, self.spacehints
+            "TOGGLE_METRICS",
+            Qt.Key.Key_M,
+            self.toggle_metrics,
+            active=True,
+            persistent=True,
         )
         self.keystroke_manager.addEvent(
-            "FINAL_OPEN_RESPONSES",
-            Qt.Key.Key_Space,
-            self.final_open_responses,
-            self.spacehints,
-        )
-        self.keystroke_manager.addEvent(
-            "FINAL_NEXT_PLAYER",
-            Qt.Key.Key_Space,
-            self.final_next_player,
-            self.spacehints,
-        )
-        self.keystroke_manager.addEvent(
-            "FINAL_SHOW_ANSWER",
-            Qt.Key.Key_Space,
-            self.final_show_answer,
-            self.spacehints,
-        )
-        self.keystroke_manager.addEvent(
-            "FINAL_CORRECT_ANSWER",
-            Qt.Key.Key_Left,
-            self.final_correct_answer,
-            self.arrowhints,
-        )
-        self.keystroke_manager.addEvent(
-            "FINAL_INCORRECT_ANSWER",
-            Qt.Key.Key_Right,
-            self.final_incorrect_answer,
-            self.arrowhints,
+            "EXPORT_METRICS",
+            Qt.Key.Key_E,
+            self.export_metrics,
+            active=True,
+            persistent=True,
         )
 
+        for name, handler in (
+            ("begin", self.on_begin),
+            ("game_started", self.on_game_started),
+            ("round_started", self.on_round_started),
+            ("players_changed", self.on_players_changed),
+            ("question_loaded", self.on_question_loaded),
+            ("daily_double_wagered", self.on_daily_double_wagered),
+            ("responses_opened", self.on_responses_opened),
+            ("responses_closed", self.on_responses_closed),
+            ("buzzed", self.on_buzzed),
+            ("buzz_hint", self.on_buzz_hint),
+            ("answer_given", self.on_answer_given),
+            ("stumped", self.on_stumped),
+            ("back_to_board", self.on_back_to_board),
+            ("score_changed", self.on_score_changed),
+            ("final_started", self.on_final_started),
+            ("wager_received", self.on_wager_received),
+            ("final_wagers_in", self.on_final_wagers_in),
+            ("final_revealed", self.on_final_revealed),
+            ("final_responses_opened", self.on_final_responses_opened),
+            ("final_time_up", self.on_final_time_up),
+            ("final_judgement_started", self.on_final_judgement_started),
+            ("final_player", self.on_final_player),
+            ("final_answer_shown", self.on_final_answer_shown),
+            ("final_wager_shown", self.on_final_wager_shown),
+            ("game_over", self.on_game_over),
+            ("game_closed", self.on_game_closed),
+            ("arrow_hints", self.arrowhints),
+            ("space_hints", self.spacehints),
+            ("state", self.spectate),
+        ):
+            self.engine.events.connect(name, handler)
+
         self.wager_trigger.connect(self.wager)
         self.buzz_trigger.connect(self.buzz)
+        self.buzz_hint_trigger.connect(self.engine.buzz_hint)
         self.new_player_trigger.connect(self.new_player)
-        self.toolate_trigger.connect(self.__toolate)
+        self.remove_player_trigger.connect(self.remove_player)
+
+    # the game state lives in the engine; these are what the widgets read
+
+    @property
+    def keystroke_manager(self):
+        return self.engine.keystroke_manager
+
+    @property
+    def data(self):
+        return self.engine.data
+
+    @data.setter
+    def data(self, data):
+        self.engine.data = data
+
+    @property
+    def players(self):
+        return self.engine.players
+
+    @property
+    def current_round(self):
+        return self.engine.current_round
+
+    @property
+    def soliciting_player(self):
+        return self.engine.soliciting_player
+
+    def valid_game(self):
+        return self.engine.valid_game()
 
     def startable(self):
-        return self.valid_game() and len(self.buzzer_controller.connected_players) > 0
+        return self.engine.startable()
 
     def begin(self):
-        self.song_player.play(repeat=True)
+        self.engine.begin()
 
     def start_game(self):
-        self.current_round = self.data.rounds[0]
-        self.dc.hide_welcome_widgets()
-        self.dc.board_widget.load_round(self.current_round)
-        self.buzzer_controller.accepting_players = False
-        self.song_player.stop()
+        self.engine.start_game()
+
+    def load_question(self, q):
+        self.engine.load_question(q)
+
+    def answer(self, player, guess):
+        self.engine.answer(player, guess)
 
     def setDisplays(self, host_display, main_display):
         self.host_display = host_display
@@ -276,6 +139,52 @@ class Game(QObject):
 
     def setBuzzerController(self, controller):
         self.buzzer_controller = controller
+        self.engine.buzzers = controller
+
+    def new_player(self):
+        self.engine.set_players(self.buzzer_controller.connected_players)
+
+    def remove_player(self, player):
+        if self.engine.remove_player(player):
+            player.waiter.close()
+
+    def buzz(self, player, emitted):
+        """`player` won the buzz; the controller has already closed the buzzers"""
+        received = time.monotonic()
+        metrics.record(player, BUZZ_SIGNAL, (received - emitted) * 1000)
+        event("buzz_shown", player=player.token.hex()[:6], signal_ms=(received - emitted) * 1000)
+        self.main_display.player_widget(player).mark_paint(received)
+        self.engine.buzz(player)
+
+    def wager(self, i_player, amount):
+        self.engine.wager(self.players[i_player], amount)
+
+    def get_dd_wager(self, player):
+        self.engine.soliciting_player = False
+
+        max_wager = self.engine.max_dd_wager(player)
+        wager_res = QInputDialog.getInt(
+            self.host_display,
+            "Wager",
+            f"How much do they wager? (max: ${max_wager})",
+            min=0,
+            max=max_wager,
+        )
+        if not wager_res[1]:
+            self.engine.soliciting_player = True
+            return False
+
+        self.engine.daily_double_wager(player, wager_res[0])
+
+    def adjust_score(self, player):
+        new_score, answered = QInputDialog.getInt(
+            self.host_display,
+            "Adjust Score",
+            "Enter a new score:",
+            value=player.score,
+        )
+        if answered:
+            self.engine.set_score(player, new_score)
 
     def arrowhints(self, val):
         self.host_display.borders.arrowhints(val)
@@ -283,169 +192,103 @@ class Game(QObject):
     def spacehints(self, val):
         self.host_display.borders.spacehints(val)
 
-    def new_player(self):
-        self.players = self.buzzer_controller.connected_players
-        self.dc.scoreboard.refresh_players()
-        self.host_display.welcome_widget.check_start()
+    def spectate(self, channel, data):
+        """publish state to the spectator page"""
+        if self.buzzer_controller is not None:
+            self.buzzer_controller.spectators.publish(channel, data)
 
-    def remove_player(self, player):
-        self.players.remove(player)
-        player.waiter.close()
+    def on_begin(self):
+        self.mixer.play("intro.wav", loop=True)
+
+    def on_game_started(self, round):
+        self.dc.hide_welcome_widgets()
+        self.dc.board_widget.load_round(round)
+        self.mixer.stop("intro.wav")
+
+    def on_round_started(self, round):
+        self.dc.board_widget.load_round(round)
+
+    def on_players_changed(self):
         self.dc.scoreboard.refresh_players()
         self.host_display.welcome_widget.check_start()
 
-    def valid_game(self):
-        return self.data is not None and all(b.complete() for b in self.data.rounds)
+    def on_question_loaded(self, q):
+        if q.dd:
+            self.mixer.play("dd.wav")
+        self.dc.load_question(q)
+        self.dc.remove_card(q)
+
+    def on_daily_double_wagered(self, q):
+        self.dc.question_widget.show_question()
 
-    def open_responses(self):
+    def on_responses_opened(self):
         self.dc.borders.lights(True)
-        self.accepting_responses = True
 
-        if not self.timer:
-            self.timer = QuestionTimer(QUESTIONTIME, self.stumped)
+    def on_responses_closed(self):
+        self.dc.borders.lights(True)
 
-        self.timer.start()
+    def on_buzzed(self, player):
+        self.dc.player_widget(player).run_lights()
+        self.dc.borders.lights(False)
 
-    def close_responses(self):
-        self.timer.pause()
-        self.accepting_responses = False
-        self.dc.borders.lights(True)
+    def on_buzz_hint(self, player):
+        self.dc.player_widget(player).buzz_hint()
 
-    def buzz(self, i_player):
-        player = self.players[i_player]
-        if self.accepting_responses and player is not self.previous_answerer:
-            logging.info(f"buzz ({time.time():.6f} s)")
-            self.accepting_responses = False
-            self.timer.pause()
-            self.previous_answerer = player
-            self.dc.player_widget(player).run_lights()
-
-            self.answering_player = player
-            self.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
-            self.dc.borders.lights(False)
-        elif self.active_question is None:
-            self.dc.player_widget(player).buzz_hint()
-        else:
-            pass
+    def on_answer_given(self, player):
+        self.dc.player_widget(player).stop_lights()
 
-    def answer_given(self):
-        self.keystroke_manager.deactivate("CORRECT_ANSWER", "INCORRECT_ANSWER")
-        self.dc.player_widget(self.answering_player).stop_lights()
-        self.answering_player = None
+    def on_stumped(self):
+        self.mixer.play("stumped.wav")
+        self.dc.borders.flash()
 
-    def back_to_board(self):
-        logging.info("back_to_board")
+    def on_back_to_board(self):
         self.dc.hide_question()
-        self.timer = None
-        self.active_question.complete = True
-        self.active_question = None
-        self.previous_answerer = None
-        if all(q.complete for q in self.current_round.questions):
-            logging.info("NEXT ROUND")
-            self.keystroke_manager.activate("NEXT_ROUND")
-
-    def next_round(self):
-        logging.info("next round")
-        i = self.data.rounds.index(self.current_round)
-        logging.info(f"ROUND {i}")
-        self.current_round = self.data.rounds[i + 1]
-
-        if isinstance(self.current_round, FinalBoard):
-            self.dc.load_final(self.current_round.question)
-            self.start_final()
-        else:
-            self.dc.board_widget.load_round(self.current_round)
 
-    def start_final(self):
-        logging.info("start final")
+    def on_score_changed(self, player):
+        self.dc.player_widget(player).update_score()
+
+    def on_final_started(self, q):
+        self.dc.load_final(q)
         for player in self.players:
             self.dc.player_widget(player).set_lights(True)
 
-        self.buzzer_controller.open_wagers()
-
-    def wager(self, i_player, amount):
-        player = self.players[i_player]
-        player.wager = amount
+    def on_wager_received(self, player):
         self.dc.player_widget(player).set_lights(False)
-        logging.info(f"{player} wagered {amount}")
-        if all(p.wager is not None for p in self.players):
-            self.host_display.question_widget.hint_label.setText(
-                "Press space to show clue!"
-            )
-            self.keystroke_manager.activate("OPEN_FINAL")
 
-    def answer(self, player, guess):
-        player.finalanswer = guess
-        logging.info(f"{player} guessed {guess}")
+    def on_final_wagers_in(self):
+        self.host_display.question_widget.hint_label.setText(
+            "Press space to show clue!"
+        )
+
+    def on_final_revealed(self):
+        self.dc.question_widget.show_question()
 
-    def final_open_responses(self):
+    def on_final_responses_opened(self):
         self.dc.borders.lights(True)
-        self.buzzer_controller.prompt_answers()
+        self.mixer.play("final.wav")
 
-        self.song_player.final()
+    def on_final_time_up(self):
+        self.dc.borders.flash()
 
-        self.timer = QuestionTimer(FJTIME, self.final_finished_song)
-        self.timer.start()
+    def on_final_judgement_started(self):
+        self.dc.load_final_judgement()
 
-    def final_next_player(self):
+    def on_final_player(self, player):
         for p in self.players:
-            self.dc.player_widget(p).set_lights(False)
-
-        if self.__judgement_round == 0:
-            self.dc.load_final_judgement()
-            self.__sorted_players = sorted(self.players, key=lambda x: x.score)
-
-        elif self.__judgement_round == len(self.players):
-            self.end_game()
-            return
-
-        self.answering_player = self.__sorted_players[self.__judgement_round]
-
-        self.dc.player_widget(self.answering_player).set_lights(True)
+            self.dc.player_widget(p).set_lights(p is player)
 
         self.dc.final_window.guess_label.setText("")
         self.dc.final_window.wager_label.setText("")
 
-        self.keystroke_manager.activate("FINAL_SHOW_ANSWER")
-
-    def final_show_answer(self):
-        answer = self.answering_player.finalanswer
-        if answer == "":
-            answer = "________"
-
+    def on_final_answer_shown(self, player, answer):
         self.dc.final_window.guess_label.setText(answer)
-        self.keystroke_manager.activate(
-            "FINAL_CORRECT_ANSWER", "FINAL_INCORRECT_ANSWER"
-        )
 
-    def final_correct_answer(self):
-        ap = self.answering_player
-        self.set_score(ap, ap.score + ap.wager)
-        self.final_judgement_given()
+    def on_final_wager_shown(self, player, wager):
+        self.dc.final_window.wager_label.setText(str(wager))
 
-    def final_incorrect_answer(self):
-        ap = self.answering_player
-        self.set_score(ap, ap.score - ap.wager)
-        self.final_judgement_given()
-
-    def final_judgement_given(self):
-        self.keystroke_manager.deactivate(
-            "FINAL_CORRECT_ANSWER", "FINAL_INCORRECT_ANSWER"
-        )
-        self.dc.final_window.wager_label.setText(str(self.answering_player.wager))
-        self.keystroke_manager.activate("FINAL_NEXT_PLAYER")
-        self.__judgement_round += 1
-
-    def final_finished_song(self):
-        logging.info("Final song ended")
-        self.toolate_trigger.emit()
-        self.accepting_responses = False
-        self.dc.borders.flash()
-        self.keystroke_manager.activate("FINAL_NEXT_PLAYER")
-
-    def end_game(self):
-        top_score = max([p.score for p in self.players])
-        winners = [p for p in self.players if p.score == top_score]
+    def on_game_over(self, winners):
+        for p in self.players:
+            self.dc.player_widget(p).set_lights(False)
         for w in winners:
             self.dc.player_widget(w).set_lights(True)
 
@@ -454,122 +297,15 @@ class Game(QObject):
         else:
             self.dc.final_window.show_tie()
 
-        print("activate close game")
-        self.keystroke_manager.activate("CLOSE_GAME")
-
-    def close_game(self):
-        self.buzzer_controller.restart()
-        self.players = []
-        self.current_round = None
-        self.answering_player = None
-        self.timer = None
-        self.data = None
-        self.__judgement_round = 0
+    def on_game_closed(self):
         self.dc.restart()
-        self.begin()
-
-    def get_dd_wager(self, player):
-        self.answering_player = player
-        self.soliciting_player = False
-
-        max_wager = max(self.answering_player.score, 1000)
-        wager_res = QInputDialog.getInt(
-            self.host_display,
-            "Wager",
-            f"How much do they wager? (max: ${max_wager})",
-            min=0,
-            max=max_wager,
-        )
-        if not wager_res[1]:
-            self.soliciting_player = True
-            return False
-
-        wager = wager_res[0]
-        self.active_question.value = wager
-
-        self.keystroke_manager.activate("CORRECT_ANSWER", "INCORRECT_ANSWER")
-        self.dc.question_widget.show_question()
-
-    def load_question(self, q):
-        self.active_question = q
-        if q.dd:
-            logging.info("Daily double!")
-            wo = sa.WaveObject.from_wave_file(resource_path("dd.wav"))
-            wo.play()
-            self.soliciting_player = True
-        else:
-            self.keystroke_manager.activate("OPEN_RESPONSES")
-        self.dc.load_question(q)
-        self.dc.remove_card(q)
 
-    def open_final(self):
-        self.dc.question_widget.show_question()
-        self.keystroke_manager.activate("FINAL_OPEN_RESPONSES")
+    def toggle_metrics(self):
+        self.host_display.metrics_overlay.toggle()
 
-    def correct_answer(self):
-        if self.timer:
-            self.timer.cancel()
-
-        self.set_score(
-            self.answering_player,
-            self.answering_player.score + self.active_question.value,
-        )
-        self.dc.borders.lights(False)
-        self.answer_given()
-        self.back_to_board()
-
-    def incorrect_answer(self):
-        self.set_score(
-            self.answering_player,
-            self.answering_player.score - self.active_question.value,
-        )
-        self.answer_given()
-        if self.active_question.dd:
-            self.back_to_board()
-        else:
-            self.open_responses()
-            self.timer.resume()
-
-    def stumped(self):
-        self.accepting_responses = False
-        sa.WaveObject.from_wave_file(resource_path("stumped.wav")).play()
-        self.dc.borders.flash()
-        self.keystroke_manager.activate("BACK_TO_BOARD")
-
-    def __toolate(self):
-        self.buzzer_controller.toolate()
-
-    def set_score(self, player, score):
-        player.score = score
-        self.dc.player_widget(player).update_score()
-
-    def adjust_score(self, player):
-        new_score, answered = QInputDialog.getInt(
-            self.host_display,
-            "Adjust Score",
-            "Enter a new score:",
-            value=player.score,
-        )
-        if answered:
-            self.set_score(player, new_score)
+    def export_metrics(self):
+        self.host_display.metrics_overlay.export()
 
     def close(self):
-        self.song_player.stop()
+        self.mixer.stop()
         QApplication.quit()
-
-
-class Player(object):
-    def __init__(self, name, waiter):
-        self.name = name
-        self.token = os.urandom(15)
-        self.score = 0
-        self.waiter = waiter
-        self.wager = None
-        self.finalanswer = ""
-        self.page = "buzz"
-
-    def __hash__(self):
-        return int.from_bytes(self.token, sys.byteorder)
-
-    def state(self):
-        return {"page": self.page, "score": self.score}
@@ -0,0 +1,329 @@
+"""Single-pass parser for J-Archive game pages.
+
+`parse_game_page` streams through the page with the standard library's event
+based HTMLParser and emits Question objects as each clue cell closes, instead of
+building a full document tree and searching it. It stops reading as soon as the
+Final Jeopardy round is done, skipping the scores and comments at the bottom.
+
+    python -m jparty.jarchive saved_page.html [...]
+
+times it against the BeautifulSoup parser it replaced.
+"""
+
+import re
+import sys
+import time
+import logging
+from html import unescape
+from html.parser import HTMLParser
+
+from jparty.engine import Question, Board, FinalBoard, GameData
+from jparty.constants import MONIES
+
+
+CHUNK_SIZE = 16384
+ANSWER_RE = re.compile(r'correct_response">(.*?)</em', re.S)
+
+
+class IncompleteGame(Exception):
+    pass
+
+
+class JArchiveParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.title = None
+        self.comments = None
+        self.boards = []
+
+        self.__td_depth = 0
+        self.__table_depth = 0
+
+        self.__capture = None  # name of the field receiving text
+        self.__capture_depth = 0  # td depth (or em for answers) ending the capture
+        self.__buffer = []
+
+        self.__round = None  # "round" or "final"
+        self.__round_depth = 0
+        self.__categories = []
+        self.__questions = []
+        self.__round_answer = None
+
+        self.__clue = None
+        self.__clue_depth = 0
+        self.__final_text = None
+
+        self.__in_game_title = False
+
+    # text capture
+
+    def __start_capture(self, name, depth=None):
+        self.__capture = name
+        self.__capture_depth = self.__td_depth if depth is None else depth
+        self.__buffer = []
+
+    def __end_capture(self):
+        text = "".join(self.__buffer)
+        name = self.__capture
+        self.__capture = None
+
+        if name == "title":
+            self.title = text
+        elif name == "comments":
+            self.comments = text
+        elif name == "category":
+            self.__categories.append(text)
+        elif name == "clue_text":
+            self.__clue["text"] = text
+        elif name == "answer":
+            self.__set_answer(text)
+
+    def __set_answer(self, answer):
+        if self.__clue is not None and self.__clue["answer"] is None:
+            self.__clue["answer"] = answer
+        if self.__round_answer is None:
+            self.__round_answer = answer
+
+    # HTMLParser events
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+
+        if self.__capture in ("title", "comments"):
+            # only the text before the first child element
+            self.__end_capture()
+        elif self.__capture == "answer":
+            self.__buffer.append(self.get_starttag_text())
+
+        if tag == "table":
+            self.__table_depth += 1
+            if self.__round is None and ("round" in classes or "final_round" in classes):
+                self.__start_round("final" if "final_round" in classes else "round")
+        elif tag == "td":
+            self.__td_depth += 1
+        elif tag == "h1" and self.__in_game_title and self.title is None:
+            self.__start_capture("title")
+        elif tag == "div":
+            if attrs.get("id") == "game_title":
+                self.__in_game_title = True
+            elif attrs.get("id") == "game_comments":
+                self.__start_capture("comments")
+
+        if self.__round is None:
+            return
+
+        for value in attrs.values():
+            if value and "correct_response" in value:
+                found = ANSWER_RE.findall(value)
+                if found:
+                    self.__set_answer(found[0])
+
+        if tag == "td":
+            if "category_name" in classes:
+                self.__start_capture("category")
+            elif "clue" in classes and self.__clue is None:
+                self.__clue = {"text": None, "id": None, "dd": False, "answer": None}
+                self.__clue_depth = self.__td_depth
+            elif "clue_text" in classes and self.__clue is not None:
+                if self.__clue["id"] is None:
+                    self.__clue["id"] = attrs.get("id", "")
+                    self.__start_capture("clue_text")
+
+        if "clue_value_daily_double" in classes and self.__clue is not None:
+            self.__clue["dd"] = True
+
+        if tag == "em" and "correct_response" in classes and self.__capture is None:
+            self.__start_capture("answer", depth=-1)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.done:
+            return
+        if self.__capture == "answer":
+            self.__buffer.append(self.get_starttag_text())
+        elif self.__capture in ("title", "comments"):
+            self.__end_capture()
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if self.__capture == "answer":
+            if tag == "em":
+                self.__end_capture()
+            else:
+                self.__buffer.append(f"</{tag}>")
+        elif self.__capture in ("title", "comments"):
+            self.__end_capture()
+
+        if tag == "td":
+            if self.__capture is not None and self.__td_depth == self.__capture_depth:
+                self.__end_capture()
+            if self.__clue is not None and self.__td_depth == self.__clue_depth:
+                self.__end_clue()
+            self.__td_depth -= 1
+        elif tag == "table":
+            if self.__round is not None and self.__table_depth == self.__round_depth:
+                self.__end_round()
+            self.__table_depth -= 1
+        elif tag == "div":
+            self.__in_game_title = False
+
+    def handle_data(self, data):
+        if self.__capture is not None:
+            self.__buffer.append(data)
+
+    # rounds and clues
+
+    def __start_round(self, kind):
+        self.__round = kind
+        self.__round_depth = self.__table_depth
+        self.__categories = []
+        self.__questions = []
+        self.__round_answer = None
+
+    def __end_clue(self):
+        clue = self.__clue
+        self.__clue = None
+
+        if clue["text"] is None:
+            logging.info("this game is incomplete")
+            raise IncompleteGame()
+
+        if self.__round == "final":
+            if self.__final_text is None:
+                self.__final_text = clue["text"]
+            return
+
+        i = len(self.boards)
+        index_key = clue["id"]
+        index = (int(index_key[-3]) - 1, int(index_key[-1]) - 1)
+        value = MONIES[i][index[1]]
+        self.__questions.append(
+            Question(
+                index,
+                clue["text"],
+                clue["answer"],
+                self.__categories[index[0]],
+                value,
+                clue["dd"],
+            )
+        )
+
+    def __end_round(self):
+        kind = self.__round
+        self.__round = None
+
+        if kind == "round":
+            i = len(self.boards)
+            self.boards.append(Board(self.__categories, self.__questions, dj=(i == 1)))
+        else:
+            category = self.__categories[0]
+            question = Question((0, 0), self.__final_text, self.__round_answer, category)
+            self.boards.append(FinalBoard(category, question))
+            self.done = True
+
+
+def parse_game_page(html):
+    """parse the text of a J-Archive showgame page into GameData.
+    Returns None if the game is incomplete or the page is not a game."""
+    parser = JArchiveParser()
+    try:
+        for i in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[i : i + CHUNK_SIZE])
+            if parser.done:
+                break
+    except IncompleteGame:
+        return None
+
+    if parser.title is None or not parser.done:
+        return None
+
+    datesearch = re.search(r"- \w+, (.*?)$", parser.title)
+    if datesearch is None:
+        return None
+    date = datesearch.groups()[0]
+
+    comments = parser.comments if parser.comments is not None else ""
+    return GameData(parser.boards, date, comments)
+
+
+def findanswer(clue):
+    return ANSWER_RE.findall(unescape(str(clue)))[0]
+
+
+def parse_game_page_soup(html):
+    """the previous BeautifulSoup implementation, kept as the reference for benchmarks"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    datesearch = re.search(
+        r"- \w+, (.*?)$", soup.select("#game_title > h1")[0].contents[0]
+    )
+    if datesearch is None:
+        return None
+    date = datesearch.groups()[0]
+    comments = soup.select("#game_comments")[0].contents
+    comments = comments[0] if len(comments) > 0 else ""
+
+    boards = []
+    rounds = soup.find_all(class_="round")
+    for i, ro in enumerate(rounds):
+        categories_objs = ro.find_all(class_="category")
+        categories = [c.find(class_="category_name").text for c in categories_objs]
+        questions = []
+        for clue in ro.find_all(class_="clue"):
+            text_obj = clue.find(class_="clue_text")
+            if text_obj is None:
+                return None
+
+            index_key = text_obj["id"]
+            index = (int(index_key[-3]) - 1, int(index_key[-1]) - 1)
+            dd = clue.find(class_="clue_value_daily_double") is not None
+            value = MONIES[i][index[1]]
+            questions.append(
+                Question(
+                    index, text_obj.text, findanswer(clue), categories[index[0]], value, dd
+                )
+            )
+        boards.append(Board(categories, questions, dj=(i == 1)))
+
+    final_round_obj = soup.find_all(class_="final_round")[0]
+    category_obj = final_round_obj.find_all(class_="category")[0]
+    category = category_obj.find(class_="category_name").text
+    clue = final_round_obj.find_all(class_="clue")[0]
+    text_obj = clue.find(class_="clue_text")
+    if text_obj is None:
+        return None
+
+    question = Question((0, 0), text_obj.text, findanswer(final_round_obj), category)
+    boards.append(FinalBoard(category, question))
+
+    return GameData(boards, date, comments)
+
+
+def benchmark(paths, repeat=20):
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        results = []
+        for parse in (parse_game_page_soup, parse_game_page):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                data = parse(html)
+            elapsed = (time.perf_counter() - start) / repeat
+            results.append((parse.__name__, elapsed, data))
+
+        from jparty.library import game_to_dict
+
+        same = [d and game_to_dict(d) for _, _, d in results]
+        same = same[0] == same[1]
+        print(f"{path}: " + ", ".join(f"{n} {t * 1000:.2f} ms" for n, t, _ in results))
+        print(f"    speedup {results[0][1] / results[1][1]:.1f}x, identical output: {same}")
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1:])
@@ -0,0 +1,150 @@
+import os
+import time
+import queue
+import atexit
+import logging
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from jparty.environ import userdir
+from jparty.constants import LOG_MAX_BYTES, LOG_BACKUPS, LOG_SESSIONS, EVENT_HISTORY
+
+
+LOG_PATH = os.path.join(userdir, "logs")
+LOG_FORMAT = "%(asctime)s %(levelname)s %(threadName)s %(name)s: %(message)s"
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Hands records to the listener thread as they are.
+
+    The stock QueueHandler formats the message on the calling thread; this one
+    leaves that to the listener, so a logging call on the IOLoop or GUI thread
+    costs a queue put. Arguments are therefore formatted a moment later, and
+    should not be mutated after the call.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class EventHistory(object):
+    """The most recent structured events, kept in memory for crash reports.
+
+    Recording is a deque append of a timestamp, a kind and the fields as given,
+    with nothing formatted, so it is cheap enough for the buzz path. The events
+    also go to the log at DEBUG level.
+    """
+
+    def __init__(self, size=EVENT_HISTORY):
+        self.__events = deque(maxlen=size)
+        self.__log = logging.getLogger("jparty.events")
+
+    def record(self, kind, **fields):
+        self.__events.append((time.time(), kind, fields))
+        if self.__log.isEnabledFor(logging.DEBUG):
+            self.__log.debug("%s %s", kind, fields)
+
+    def recent(self):
+        return list(self.__events)
+
+    def dump(self):
+        """the events as text, oldest first"""
+        return "\n".join(
+            time.strftime("%H:%M:%S", time.localtime(t))
+            + f".{int(t % 1 * 1000):03d} {kind} "
+            + " ".join(f"{k}={v}" for k, v in fields.items())
+            for t, kind, fields in self.recent()
+        )
+
+
+events = EventHistory()
+event = events.record
+
+
+class Journal(object):
+    """The logging backend: records are queued by whichever thread logs them
+    and formatted and written by one listener thread, to a log file per
+    session that rotates at LOG_MAX_BYTES. Only the newest LOG_SESSIONS
+    sessions' files are kept."""
+
+    def __init__(self, directory=LOG_PATH):
+        self.directory = directory
+        self.queue = queue.Queue()
+        self.listener = None
+        self.filename = None
+
+    def start(self, level=logging.DEBUG):
+        os.makedirs(self.directory, exist_ok=True)
+        self.prune()
+        self.filename = os.path.join(
+            self.directory, time.strftime("jparty-%Y%m%d-%H%M%S") + f"-{os.getpid()}.log"
+        )
+        file_handler = RotatingFileHandler(
+            self.filename,
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUPS,
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        self.listener = QueueListener(
+            self.queue, file_handler, respect_handler_level=True
+        )
+        self.listener.start()
+
+        # LOG_FORMAT has no use for where a call was made from, or which
+        # process made it; skip collecting them (see "Optimization" in the
+        # logging docs)
+        logging._srcfile = None
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        root = logging.getLogger()
+        root.addHandler(DeferredQueueHandler(self.queue))
+        root.setLevel(level)
+        atexit.register(self.stop)
+        return self.filename
+
+    def flush(self):
+        """wait until everything logged so far is written"""
+        if self.listener is not None:
+            self.queue.join()
+            for handler in self.listener.handlers:
+                handler.flush()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def sessions(self):
+        """the log files of each past session, oldest session first"""
+        sessions = {}
+        for name in os.listdir(self.directory):
+            if name.startswith("jparty-") and ".log" in name:
+                stem = name[: name.index(".log")]
+                sessions.setdefault(stem, []).append(name)
+        return [sessions[stem] for stem in sorted(sessions)]
+
+    def prune(self):
+        # this session is about to be added, so keep one fewer
+        for names in self.sessions()[: -(LOG_SESSIONS - 1) or None]:
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    logging.warning("could not remove old log %s", name)
+
+    def read(self):
+        """this session's log, including any rotated parts, oldest first"""
+        self.flush()
+        text = []
+        for i in range(LOG_BACKUPS, -1, -1):
+            path = self.filename if i == 0 else f"{self.filename}.{i}"
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    text.append(f.read())
+        return "".join(text)
+
+
+journal = Journal()
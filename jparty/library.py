@@ -0,0 +1,271 @@
+import os
+import re
+import gzip
+import json
+import time
+import logging
+from threading import Lock
+
+from jparty.engine import Question, Board, FinalBoard, GameData
+from jparty.environ import userdir
+from jparty.constants import LIBRARY_TTL, GSHEET_TTL, LIBRARY_MAX_BYTES
+
+
+LIBRARY_PATH = os.path.join(userdir, "library")
+
+
+def is_gsheet_id(game_id):
+    return len(str(game_id)) >= 7
+
+
+def question_to_list(q):
+    return [list(q.index), q.text, q.answer, q.category, q.value, q.dd]
+
+
+def question_from_list(l):
+    index, text, answer, category, value, dd = l
+    return Question(tuple(index), text, answer, category, value, dd)
+
+
+def game_to_dict(data):
+    """flatten a GameData into plain lists so it can be stored as json"""
+    rounds = []
+    for b in data.rounds:
+        if isinstance(b, FinalBoard):
+            rounds.append({"final": True, "question": question_to_list(b.question)})
+        else:
+            rounds.append(
+                {
+                    "categories": b.categories,
+                    "dj": b.dj,
+                    "questions": [question_to_list(q) for q in b.questions],
+                }
+            )
+    return {"rounds": rounds, "date": data.date, "comments": data.comments}
+
+
+def game_from_dict(d):
+    rounds = []
+    for r in d["rounds"]:
+        if r.get("final", False):
+            q = question_from_list(r["question"])
+            rounds.append(FinalBoard(q.category, q))
+        else:
+            questions = [question_from_list(l) for l in r["questions"]]
+            rounds.append(Board(r["categories"], questions, dj=r["dj"]))
+    return GameData(rounds, d["date"], d["comments"])
+
+
+class GameLibrary(object):
+    """On-disk store of parsed games, keyed by J-Archive game id or GSheet id.
+
+    Each game is kept as a gzipped json file. Entries expire after a TTL and the
+    least recently used entries are evicted once the library exceeds `max_bytes`.
+    Every `get` decodes a fresh GameData, so a game in progress never mutates the
+    stored copy.
+    """
+
+    def __init__(self, path=LIBRARY_PATH, ttl=LIBRARY_TTL, max_bytes=LIBRARY_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__lock = Lock()
+        self.__index = None  # key -> [size, stored time, last access time]
+        self.__bytes = 0
+        self.__incomplete = None  # key -> time the game was found incomplete
+
+    def key(self, game_id):
+        key = str(game_id).strip()
+        if re.fullmatch(r"[A-Za-z0-9_-]+", key) is None:
+            return None
+        return key
+
+    def filename(self, key):
+        return os.path.join(self.path, key + ".json.gz")
+
+    def __load_index(self):
+        if self.__index is not None:
+            return self.__index
+
+        self.__index = {}
+        if os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".json.gz"):
+                    st = entry.stat()
+                    key = entry.name[: -len(".json.gz")]
+                    self.__index[key] = [st.st_size, st.st_mtime, st.st_atime]
+                    self.__bytes += st.st_size
+        return self.__index
+
+    def __load_incomplete(self):
+        if self.__incomplete is None:
+            try:
+                with open(os.path.join(self.path, "incomplete.json"), "r") as f:
+                    self.__incomplete = json.load(f)
+            except (OSError, ValueError):
+                self.__incomplete = {}
+        return self.__incomplete
+
+    def mark_incomplete(self, game_id):
+        """remember that a J-Archive game has blank clues so it is not fetched again"""
+        key = self.key(game_id)
+        if key is None or is_gsheet_id(key):
+            return  # custom games are fixed by editing the sheet
+        with self.__lock:
+            incomplete = self.__load_incomplete()
+            incomplete[key] = time.time()
+            os.makedirs(self.path, exist_ok=True)
+            filename = os.path.join(self.path, "incomplete.json")
+            with open(filename + ".tmp", "w") as f:
+                json.dump(incomplete, f)
+            os.replace(filename + ".tmp", filename)
+
+    def is_incomplete(self, game_id):
+        key = self.key(game_id)
+        if key is None:
+            return False
+        with self.__lock:
+            found = self.__load_incomplete().get(key)
+            return found is not None and not self.__expired(key, found)
+
+    def game_ids(self):
+        """ids of the J-Archive games currently stored"""
+        with self.__lock:
+            return [
+                k
+                for k, e in self.__load_index().items()
+                if not is_gsheet_id(k) and not self.__expired(k, e[1])
+            ]
+
+    def ttl_for(self, key):
+        return GSHEET_TTL if is_gsheet_id(key) else self.ttl
+
+    def __expired(self, key, stored):
+        return time.time() - stored > self.ttl_for(key)
+
+    def __contains__(self, game_id):
+        key = self.key(game_id)
+        if key is None:
+            return False
+        with self.__lock:
+            entry = self.__load_index().get(key)
+            return entry is not None and not self.__expired(key, entry[1])
+
+    def __len__(self):
+        """the number of unexpired games, like `in`"""
+        with self.__lock:
+            return sum(
+                not self.__expired(k, e[1]) for k, e in self.__load_index().items()
+            )
+
+    def get(self, game_id, allow_expired=False):
+        """return the stored GameData, or None if missing or expired.
+        `allow_expired` returns stale entries too, for playing offline"""
+        key = self.key(game_id)
+        if key is None:
+            return None
+
+        with self.__lock:
+            index = self.__load_index()
+            entry = index.get(key)
+            if entry is None or (
+                not allow_expired and self.__expired(key, entry[1])
+            ):
+                self.misses += 1
+                return None
+            try:
+                with gzip.open(self.filename(key), "rt", encoding="utf-8") as f:
+                    d = json.load(f)
+            except (OSError, ValueError):
+                logging.warning("corrupt library entry %s", key, exc_info=True)
+                self.__remove(key)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry[2] = time.time()
+            try:
+                os.utime(self.filename(key), (entry[2], entry[1]))
+            except OSError:
+                pass  # removed since it was read; the data is still good
+
+        return game_from_dict(d)
+
+    def put(self, game_id, data):
+        key = self.key(game_id)
+        if key is None or data is None:
+            return
+
+        raw = json.dumps(game_to_dict(data), separators=(",", ":")).encode("utf-8")
+        blob = gzip.compress(raw)
+
+        with self.__lock:
+            index = self.__load_index()
+            os.makedirs(self.path, exist_ok=True)
+            filename = self.filename(key)
+            tmp = filename + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, filename)
+            now = time.time()
+            if key in index:
+                self.__bytes -= index[key][0]
+            index[key] = [len(blob), now, now]
+            self.__bytes += len(blob)
+            if self.__bytes > self.max_bytes:
+                self.__evict()
+
+    def prepopulate(self, game_ids, fetch=None):
+        """fetch and store every game in `game_ids` that is not already present.
+        Returns the number of games added."""
+        if fetch is None:
+            from jparty.retrieve import fetch_game as fetch
+
+        added = 0
+        for game_id in game_ids:
+            if game_id in self:
+                continue
+            try:
+                data = fetch(game_id)
+            except Exception:
+                logging.error("cannot prepopulate game %s", game_id, exc_info=True)
+                continue
+            if data is not None:
+                self.put(game_id, data)
+                added += 1
+        return added
+
+    def stats(self):
+        with self.__lock:
+            index = self.__load_index()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "games": len(index),
+                "bytes": self.__bytes,
+            }
+
+    def __remove(self, key):
+        entry = self.__index.pop(key, None)
+        if entry is not None:
+            self.__bytes -= entry[0]
+        try:
+            os.remove(self.filename(key))
+        except OSError:
+            pass
+
+    def __evict(self):
+        index = self.__index
+        for key in [k for k, e in index.items() if self.__expired(k, e[1])]:
+            self.__remove(key)
+
+        for key in sorted(index, key=lambda k: index[k][2]):
+            if self.__bytes <= self.max_bytes:
+                break
+            self.__remove(key)
+            logging.info("evicted %s from game library", key)
+
+
+library = GameLibrary()
@@ -0,0 +1,197 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+import time
+import queue
+import random
+import logging
+from collections import deque, OrderedDict
+from threading import Thread, Lock, Event
+
+from jparty.library import library
+from jparty.constants import (
+    LOAD_DEBOUNCE,
+    LOAD_TIMEOUT,
+    RANDOM_POOL_SIZE,
+    RANDOM_POOL_DRAWS,
+    RANDOM_POOL_HISTORY,
+)
+
+
+class GameLoader(QObject):
+    """Loads games off the Qt thread, one at a time.
+
+    Requests are debounced, so typing an id only fetches once the typing pauses.
+    Only the most recently requested id is ever delivered: queued requests that
+    have been superseded are skipped, a request for the id already being fetched
+    joins that fetch, and results for stale ids are dropped. Results come back
+    on the Qt thread through the `loaded` and `failed` signals.
+
+    The retrieval code, which pulls in requests and the page parser, is only
+    imported by the worker on its first fetch, so it costs nothing at startup.
+    """
+
+    loaded = pyqtSignal(str, object)  # game id, GameData
+    failed = pyqtSignal(str)
+
+    def __init__(self, debounce=LOAD_DEBOUNCE, timeout=LOAD_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.timeout = timeout
+        self.session = None  # created by the worker on its first fetch
+
+        self.__debounce = QTimer(self)
+        self.__debounce.setSingleShot(True)
+        self.__debounce.setInterval(int(debounce * 1000))
+        self.__debounce.timeout.connect(self.__dispatch)
+
+        self.__lock = Lock()
+        self.__wanted = None  # id whose result will be delivered
+        self.__pending = None  # id waiting for the debounce timer
+        self.__inflight = None  # id the worker is fetching
+
+        self.__queue = queue.Queue()
+        self.__worker = Thread(target=self.__work, name="game_loader", daemon=True)
+        self.__worker.start()
+
+    def request(self, game_id, debounce=True):
+        """load `game_id`, superseding any earlier request"""
+        game_id = str(game_id).strip()
+        with self.__lock:
+            self.__wanted = game_id
+        self.__pending = game_id
+        if debounce:
+            self.__debounce.start()
+        else:
+            self.__debounce.stop()
+            self.__dispatch()
+
+    def cancel(self):
+        self.__debounce.stop()
+        with self.__lock:
+            self.__wanted = None
+        self.__pending = None
+
+    def __dispatch(self):
+        game_id = self.__pending
+        self.__pending = None
+        with self.__lock:
+            if game_id is None or game_id != self.__wanted:
+                return
+            if game_id == self.__inflight:
+                logging.info("joining load of game %s", game_id)
+                return
+        self.__queue.put(game_id)
+
+    def __work(self):
+        while True:
+            game_id = self.__queue.get()
+            with self.__lock:
+                if game_id != self.__wanted:
+                    continue  # superseded while queued
+                self.__inflight = game_id
+
+            try:
+                from jparty.retrieve import get_game, TimeoutSession
+
+                if self.session is None:
+                    self.session = TimeoutSession(self.timeout)
+                data = get_game(game_id, self.session)
+                error = None
+            except Exception as e:
+                logging.info("cannot get game %s: %r", game_id, e)
+                data, error = None, e
+
+            with self.__lock:
+                self.__inflight = None
+                current = game_id == self.__wanted
+
+            if not current:
+                logging.info("dropping stale game %s", game_id)
+            elif error is not None:
+                self.failed.emit(game_id)
+            else:
+                self.loaded.emit(game_id, data)
+
+
+class RandomGamePool(QObject):
+    """Keeps `size` complete, parsed random games ready so Random is instant.
+
+    A background thread tops the pool up, preferring unplayed games from the
+    local library and falling back to J-Archive's random clue on the homepage.
+    Games found to be incomplete are recorded in the library and never fetched
+    again. The last RANDOM_POOL_HISTORY ids tried are never drawn again, from
+    either source. Nothing is fetched, or imported for fetching, until `start`, which
+    the app calls once its displays are up.
+    """
+
+    ready = pyqtSignal()
+
+    def __init__(self, size=RANDOM_POOL_SIZE, timeout=LOAD_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.timeout = timeout
+        self.session = None
+        self.__games = deque()
+        self.__used = OrderedDict()  # recently tried ids, oldest first
+        self.__lock = Lock()
+        self.__wake = Event()
+        self.__thread = Thread(target=self.__fill, name="random_pool", daemon=True)
+
+    def start(self):
+        if self.__thread.ident is None:
+            self.__thread.start()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__games)
+
+    def take(self):
+        """return a (game id, GameData) pair, or None if the pool is empty"""
+        with self.__lock:
+            item = self.__games.popleft() if self.__games else None
+        self.__wake.set()
+        return item
+
+    def __candidate(self):
+        with self.__lock:
+            taken = self.__used.keys() | {i for i, _ in self.__games}
+        stored = [i for i in library.game_ids() if i not in taken]
+        if stored:
+            return random.choice(stored)
+        from jparty.retrieve import get_random_game
+
+        for _ in range(RANDOM_POOL_DRAWS):
+            game_id = str(get_random_game(self.session))
+            if game_id not in taken:
+                return game_id
+        raise LookupError(f"no new random game in {RANDOM_POOL_DRAWS} draws")
+
+    def __fill(self):
+        from jparty.retrieve import get_game, TimeoutSession
+
+        self.session = TimeoutSession(self.timeout)
+        while True:
+            if len(self) >= self.size:
+                self.__wake.wait()
+                self.__wake.clear()
+                continue
+
+            try:
+                game_id = self.__candidate()
+                data = get_game(game_id, self.session)
+            except Exception as e:
+                logging.info("cannot fill random pool: %r", e)
+                time.sleep(5)
+                continue
+
+            with self.__lock:
+                self.__used[game_id] = None
+                if len(self.__used) > RANDOM_POOL_HISTORY:
+                    self.__used.popitem(last=False)
+            if data is None or not data.complete():
+                time.sleep(0.25)
+                continue
+
+            logging.info("random game %s ready", game_id)
+            with self.__lock:
+                self.__games.append((game_id, data))
+            self.ready.emit()
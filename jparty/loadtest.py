@@ -0,0 +1,357 @@
+"""Load tests for the JParty buzzer server.
+
+    python -m jparty.loadtest reconnect --clients 20 --rounds 5
+    python -m jparty.loadtest spectators --spectators 250 --updates 50
+    python -m jparty.loadtest transport --clients 8 --buzzes 200
+
+reconnect: start a server without the GUI (or use the running one at `host`)
+and join `clients` to it: players up to MAXPLAYERS, and spectators beyond
+that. Then repeatedly drop every socket at once and reconnect them all
+simultaneously, as happens when the venue Wi-Fi blips, reporting how long each
+client takes to get its state back.
+
+spectators: start a server without the GUI, attach `spectators` spectator
+sockets and `clients` players, and publish `updates` score changes while the
+players keep making requests. Reports how long updates take to reach the
+audience and how long the players wait for replies under that load.
+
+transport: for each transport profile, start a server without the GUI, sign
+in `clients` players with a signature and have them send `buzzes` binary buzz
+frames each. Reports the server thread's CPU time per frame received and the
+time from a buzz leaving the client to the controller deciding it.
+
+The servers these start serve the buzzer page, so like the app they run from
+the jparty folder, where buzzer/ and data/ are.
+"""
+
+import time
+import base64
+import asyncio
+import argparse
+import statistics
+import threading
+
+import tornado.escape
+import tornado.ioloop
+from tornado.websocket import websocket_connect
+
+from jparty.engine import Engine
+from jparty.constants import MAXPLAYERS, PORT
+
+
+def message(msg, text=""):
+    return tornado.escape.json_encode({"message": msg, "text": text})
+
+
+async def expect(ws, msg):
+    """read until the server sends `msg`; returns its text"""
+    while True:
+        m = await ws.read_message()
+        if m is None:
+            raise ConnectionError(f"closed while waiting for {msg}")
+        if isinstance(m, bytes):
+            continue  # clock sync and other binary frames
+        parsed = tornado.escape.json_decode(m)
+        if parsed["message"] == msg:
+            return parsed["text"]
+        if parsed["message"] in ("FULL", "GAMESTARTED"):
+            raise RuntimeError(f"server refused player: {parsed['message']}")
+
+
+async def join(url, name):
+    ws = await websocket_connect(url)
+    await ws.write_message(message("NAME", name))
+    return ws, await expect(ws, "TOKEN")
+
+
+async def resume(url, token):
+    start = time.perf_counter()
+    ws = await websocket_connect(url)
+    await ws.write_message(message("CHECK_IF_EXISTS", token))
+    await expect(ws, "EXISTS")
+    return ws, time.perf_counter() - start
+
+
+async def rewatch(url):
+    """connect a spectator and wait for the state it is caught up with"""
+    start = time.perf_counter()
+    ws = await websocket_connect(url)
+    if await ws.read_message() is None:
+        raise ConnectionError("spectator closed before any state arrived")
+    return ws, time.perf_counter() - start
+
+
+async def reconnect_storm(port, host, clients, rounds):
+    if host is None:
+        host = f"localhost:{serve(port).port}"
+    player_url = f"ws://{host}/buzzersocket"
+    spectator_url = f"ws://{host}/spectatorsocket"
+
+    # a game only seats MAXPLAYERS; the rest of the room watches
+    n_players = min(clients, MAXPLAYERS)
+    n_spectators = clients - n_players
+    joined = await asyncio.gather(
+        *(join(player_url, f"load{i}") for i in range(n_players))
+    )
+    tokens = [token for _, token in joined]
+    sockets = [ws for ws, _ in joined]
+    await asyncio.sleep(0.2)  # let the roster reach the spectator channels
+    watching = await asyncio.gather(*(rewatch(spectator_url) for _ in range(n_spectators)))
+    sockets += [ws for ws, _ in watching]
+
+    for r in range(rounds):
+        for ws in sockets:
+            ws.close()
+        results = await asyncio.gather(
+            *(resume(player_url, t) for t in tokens),
+            *(rewatch(spectator_url) for _ in range(n_spectators)),
+        )
+        sockets = [ws for ws, _ in results]
+        ms = sorted(t * 1000 for _, t in results)
+        print(
+            f"round {r + 1}: {n_players} players and {n_spectators} spectators back,"
+            f" median {statistics.median(ms):.1f} ms, max {ms[-1]:.1f} ms"
+        )
+
+    for ws in sockets:
+        ws.close()
+
+
+class HeadlessGame(object):
+    """stands in for Game so the controller can run without Qt, playing by the
+    Engine's rules on the IOLoop thread"""
+
+    class Signal(object):
+        def __init__(self, slot, times=None):
+            self.slot = slot
+            self.times = times
+
+        def emit(self, *args):
+            if self.times is not None:
+                self.times.append(time.perf_counter())
+            self.slot(*args)
+
+    def __init__(self):
+        self.engine = Engine()
+        self.buzz_times = []
+        self.buzz_trigger = self.Signal(self.buzz, self.buzz_times)
+        self.buzz_hint_trigger = self.Signal(self.engine.buzz_hint, self.buzz_times)
+        self.new_player_trigger = self.Signal(self.new_player)
+        self.remove_player_trigger = self.Signal(self.remove_player)
+        self.wager_trigger = self.Signal(self.wager)
+
+    def setBuzzerController(self, controller):
+        self.engine.buzzers = controller
+        self.engine.events.connect("state", controller.spectators.publish)
+
+    @property
+    def players(self):
+        return self.engine.players
+
+    def buzz(self, player, emitted):
+        self.engine.buzz(player)
+
+    def new_player(self):
+        self.engine.set_players(self.engine.buzzers.connected_players)
+
+    def remove_player(self, player):
+        if self.engine.remove_player(player):
+            player.waiter.close()
+
+    def wager(self, i_player, amount):
+        self.engine.wager(self.players[i_player], amount)
+
+    def answer(self, player, guess):
+        self.engine.answer(player, guess)
+
+
+def serve(port, profile=None):
+    """start a headless BuzzerController on its own thread; returns it once listening"""
+    from jparty.controller import BuzzerController
+
+    ready = threading.Event()
+    controllers = []
+
+    def run():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        game = HeadlessGame()
+        controller = BuzzerController(game, profile)
+        game.setBuzzerController(controller)
+        controller.port = port
+        controllers.append(controller)
+        controller.ioloop = tornado.ioloop.IOLoop.current()
+        controller.ioloop.add_callback(ready.set)
+        controller.start(threaded=False)
+
+    threading.Thread(target=run, name="loadtest_server", daemon=True).start()
+    ready.wait()
+    return controllers[0]
+
+
+def summarize(label, seconds):
+    ms = sorted(t * 1000 for t in seconds)
+    print(
+        f"{label}: {len(ms)} samples, median {statistics.median(ms):.1f} ms,"
+        f" p95 {ms[int(0.95 * (len(ms) - 1))]:.1f} ms, max {ms[-1]:.1f} ms"
+    )
+
+
+async def watch(url, n_updates, delays):
+    """a spectator recording how long each score update took to arrive"""
+    ws = await websocket_connect(url)
+    seen = 0
+    while seen < n_updates:
+        m = await ws.read_message()
+        if m is None:
+            return
+        parsed = tornado.escape.json_decode(m)
+        if parsed["message"] == "SCORES" and parsed["text"][0] > 0:
+            delays.append(time.time() - parsed["text"][1])
+            seen = parsed["text"][0]
+    ws.close()
+
+
+async def spectator_load(port, spectators, clients, n_updates, interval):
+    controller = serve(port)
+    host = f"localhost:{controller.port}"
+
+    update_delays, request_delays = [], []
+    watchers = [
+        asyncio.ensure_future(
+            watch(f"ws://{host}/spectatorsocket", n_updates, update_delays)
+        )
+        for _ in range(spectators)
+    ]
+    players = await asyncio.gather(
+        *(join(f"ws://{host}/buzzersocket", f"load{i}") for i in range(clients))
+    )
+    await asyncio.sleep(0.5)
+
+    publishing = True
+
+    async def keep_asking(ws, token):
+        # the players' round trips through the server while it fans out
+        while publishing:
+            start = time.perf_counter()
+            await ws.write_message(message("CHECK_IF_EXISTS", token))
+            await expect(ws, "EXISTS")
+            request_delays.append(time.perf_counter() - start)
+            await asyncio.sleep(0.02)
+
+    askers = [asyncio.ensure_future(keep_asking(ws, t)) for ws, t in players]
+
+    start = time.perf_counter()
+    for i in range(1, n_updates + 1):
+        # published from this thread, as the Qt thread would
+        controller.spectators.publish("SCORES", [i, time.time()])
+        await asyncio.sleep(interval)
+    await asyncio.wait(watchers, timeout=10)
+    elapsed = time.perf_counter() - start
+    publishing = False
+    await asyncio.gather(*askers)
+
+    print(f"{spectators} spectators, {clients} players, {n_updates} updates in {elapsed:.1f} s")
+    summarize("update delivery", update_delays)
+    summarize("player round trip", request_delays)
+
+
+async def on_loop(ioloop, f):
+    """run `f` on `ioloop` and return its result"""
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    ioloop.add_callback(lambda: loop.call_soon_threadsafe(done.set_result, f()))
+    return await done
+
+
+def drawn_signature(width=1200, height=894):
+    """a sign-in like a phone's signature pad sends: a full-resolution PNG of a
+    few pen strokes, as a data URL"""
+    from PyQt6.QtGui import QImage, QPainter, QPen, QColor
+    from PyQt6.QtCore import QBuffer, QIODevice, QPointF
+
+    image = QImage(width, height, QImage.Format.Format_ARGB32)
+    image.fill(QColor("#1010a1"))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(QPen(QColor("#ffffff"), 8))
+    for i in range(6):
+        x = width * (i + 1) / 8
+        painter.drawLine(QPointF(x, height * 0.2), QPointF(x + width / 10, height * 0.8))
+    painter.end()
+
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(bytes(buffer.data())).decode()
+
+
+async def transport_load(port, clients, n_buzzes):
+    from jparty.controller import TRANSPORT_PROFILES, BUZZ_FRAME, OP_BUZZ
+
+    signature = drawn_signature()
+    for i, (name, profile) in enumerate(TRANSPORT_PROFILES.items()):
+        controller = serve(port + i, profile)
+        url = f"ws://localhost:{controller.port}/buzzersocket"
+        # offer permessage-deflate the way browsers do
+        options = {"compression_options": {}}
+
+        async def player():
+            ws = await websocket_connect(url, **options)
+            await ws.write_message(message("PROTOCOL", "binary"))
+            await ws.write_message(message("NAME", signature))
+            await expect(ws, "TOKEN")
+            return ws
+
+        sockets = await asyncio.gather(*(player() for _ in range(clients)))
+        await asyncio.sleep(0.2)
+
+        sent = []
+        controller.game.buzz_times.clear()
+        cpu_start = await on_loop(controller.ioloop, time.thread_time)
+        for _ in range(n_buzzes):
+            for ws in sockets:
+                sent.append(time.perf_counter())
+                await ws.write_message(BUZZ_FRAME.pack(OP_BUZZ, time.time()), binary=True)
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.2)
+        cpu = await on_loop(controller.ioloop, time.thread_time) - cpu_start
+
+        received = controller.game.buzz_times
+        frames = len(received)
+        print(
+            f"{name}: {frames} frames, {cpu / max(frames, 1) * 1e6:.1f} us server CPU per frame"
+        )
+        summarize("  buzz latency", [r - s for s, r in zip(sent, received)])
+        for ws in sockets:
+            ws.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the JParty buzzer server")
+    parser.add_argument("test", choices=["reconnect", "spectators", "transport"])
+    parser.add_argument(
+        "--host", default=None, help="reconnect to this running server instead of starting one"
+    )
+    parser.add_argument("--port", type=int, default=PORT + 100, help="first port for test servers")
+    parser.add_argument("--clients", type=int, default=MAXPLAYERS)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--spectators", type=int, default=250)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between updates")
+    parser.add_argument("--buzzes", type=int, default=200, help="buzz frames per player")
+    args = parser.parse_args()
+
+    if args.test == "reconnect":
+        asyncio.run(reconnect_storm(args.port, args.host, args.clients, args.rounds))
+    elif args.test == "transport":
+        asyncio.run(transport_load(args.port, args.clients, args.buzzes))
+    else:
+        asyncio.run(
+            spectator_load(
+                args.port, args.spectators, args.clients, args.updates, args.interval
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
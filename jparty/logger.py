@@ -7,12 +7,9 @@ from PyQt6.QtWidgets import QMessageBox, QApplication
 import webbrowser
 from urllib.parse import quote
 from jparty.version import version
-from jparty.environ import root
+from jparty.journal import journal, events
 
-log_filename = os.path.join(root, "latest.log")
-logging.basicConfig(
-    filename=log_filename, encoding="utf-8", level=logging.DEBUG, filemode="w"
-)
+log_filename = journal.start()
 log = logging.getLogger(__name__)
 
 
@@ -36,13 +33,16 @@ def show_exception_box(log_msg):
             defaultButton=QMessageBox.StandardButton.Yes,
         )
         if button is QMessageBox.StandardButton.Yes:
-            with open(log_filename, "r") as f:
-                logdata = f.read()
+            logdata = journal.read()
             message = f"""JPARTY ERROR REPORT:
 
 Version: {version}
 Platform: {os.uname()}
 
+===RECENT EVENTS===
+
+{events.dump()}
+
 ===LOGS===
 
 
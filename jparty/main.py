@@ -1,9 +1,10 @@
 from PyQt6.QtGui import QFontDatabase, QFont
+from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtWidgets import QApplication, QMessageBox
 
 import sys
-import requests
 import logging
+from threading import Thread
 from simpleaudio._simpleaudio import SimpleaudioError
 
 
@@ -13,23 +14,44 @@ from jparty.main_display import DisplayWindow, HostDisplayWindow
 from jparty.style import JPartyStyle
 from jparty.utils import resource_path
 from jparty.logger import qt_exception_hook
-from jparty.constants import PORT
+from jparty.library import library
+from jparty.startup import FirstFrame, mark, benchmarking
+from jparty.constants import PORT, LOAD_TIMEOUT
 
 
-def check_internet():
-    """check internet connection"""
-    try:
-        requests.get("http://www.j-archive.com/")
-    except requests.exceptions.ConnectionError:  # This is the correct syntax
-        logging.error("Connection Error")
-        QMessageBox.critical(
-            None,
-            "Cannot connect!",
-            "JParty cannot connect to the J-Archive. Please check your internet connection.",
-            buttons=QMessageBox.StandardButton.Abort,
-            defaultButton=QMessageBox.StandardButton.Abort,
-        )
-        exit(1)
+class InternetCheck(QObject):
+    """Checks the internet connection on a background thread, so the displays
+    don't wait on it. Games in the local library play offline, so the check is
+    skipped while any are unexpired. `failed` is delivered on the Qt thread."""
+
+    failed = pyqtSignal()
+
+    def start(self):
+        Thread(target=self.__check, name="internet_check", daemon=True).start()
+
+    def __check(self):
+        if len(library) > 0:
+            logging.info("game library has unexpired games, skipping internet check")
+            return
+
+        import requests
+
+        try:
+            requests.get("http://www.j-archive.com/", timeout=LOAD_TIMEOUT)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            logging.error("Connection Error")
+            self.failed.emit()
+
+
+def no_internet():
+    QMessageBox.critical(
+        None,
+        "Cannot connect!",
+        "JParty cannot connect to the J-Archive. Please check your internet connection.",
+        buttons=QMessageBox.StandardButton.Abort,
+        defaultButton=QMessageBox.StandardButton.Abort,
+    )
+    QApplication.instance().exit(1)
 
 
 def permission_error():
@@ -66,12 +88,12 @@ def check_second_monitor():
 
 
 def main():
+    mark("main")
 
     QApplication.setStyle(JPartyStyle())
     app = QApplication(sys.argv)
 
     check_second_monitor()
-    check_internet()
     app.setFont(QFont("Verdana"))
 
     i = QFontDatabase.addApplicationFont(
@@ -93,23 +115,31 @@ def main():
     main_window = DisplayWindow(game)
     host_window = HostDisplayWindow(game)
     game.setDisplays(host_window, main_window)
-    
+
+    # anything not needed to draw the displays waits until they are drawn
+    first_frame = FirstFrame((main_window, host_window))
+    if benchmarking():
+        first_frame.painted.connect(lambda: app.exit(0))
+    else:
+        internet_check = InternetCheck()
+        internet_check.failed.connect(no_internet)
+        first_frame.painted.connect(internet_check.start)
+        first_frame.painted.connect(host_window.welcome_widget.random_pool.start)
+
     try:
         game.begin()
     except SimpleaudioError as e:
         audio_error()
         exit(1)
 
-    song_player = game.song_player
-
-
+    mixer = game.mixer
 
     r=1 # fail by default
     try:
         r = app.exec()
     finally:
         logging.info("terminated")
-        if song_player:
-            song_player.stop()
+        if mixer:
+            mixer.stop()
 
         sys.exit(r)
@@ -21,6 +21,7 @@ from jparty.question_widget import (
 )
 from jparty.final_display import FinalDisplay
 from jparty.welcome_widget import Welcome, QRWidget
+from jparty.metrics_display import MetricsOverlay
 
 
 class DisplayWindow(QMainWindow):
@@ -143,9 +144,9 @@ class DisplayWindow(QMainWindow):
                 return pw
 
     def remove_card(self, q):
-        for label in self.board_widget.question_labels:
-            if label.question is q:
-                label.question = None
+        label = self.board_widget.question_card(*q.index)
+        if label.question is q:
+            label.question = None
 
     def restart(self):
         self.hide_question()
@@ -159,6 +160,7 @@ class DisplayWindow(QMainWindow):
 class HostDisplayWindow(DisplayWindow):
     def __init__(self, game):
         super().__init__(game)
+        self.metrics_overlay = MetricsOverlay(self)
 
     def host(self):
         return True
@@ -187,6 +189,11 @@ class HostDisplayWindow(DisplayWindow):
     def keyPressEvent(self, event):
         self.game.keystroke_manager.call(event.key())
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if getattr(self, "metrics_overlay", None) is not None:
+            self.metrics_overlay.setGeometry(self.rect())
+
     def hide_welcome_widgets(self):
         super().hide_welcome_widgets()
         self.scoreboard.hide_close_buttons()
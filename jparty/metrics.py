@@ -0,0 +1,165 @@
+import os
+import csv
+import json
+import time
+import logging
+from collections import deque
+from threading import Lock
+
+from jparty.environ import userdir
+
+
+METRICS_PATH = os.path.join(userdir, "metrics")
+
+RTT = "rtt"  # websocket ping to pong
+BUZZ_SIGNAL = "buzz_signal"  # buzz handed to Qt to the Game slot running
+SIGNAL_PAINT = "signal_paint"  # Game slot to the podium lights repainting
+MEASUREMENTS = (RTT, BUZZ_SIGNAL, SIGNAL_PAINT)
+
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)  # ms
+SAMPLE_HISTORY = 1024
+
+
+class Histogram(object):
+    """counts of samples (in ms) at or below each bound; the last bucket is overflow"""
+
+    def __init__(self, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def add(self, ms):
+        for i, bound in enumerate(self.bounds):
+            if ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self):
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return dict(zip(labels, self.counts))
+
+
+class Series(object):
+    """every sample of one measurement in a histogram, and the latest ones in full"""
+
+    def __init__(self, maxlen=SAMPLE_HISTORY):
+        self.samples = deque(maxlen=maxlen)  # (wall time, ms)
+        self.histogram = Histogram()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.samples.append((time.time(), ms))
+        self.histogram.add(ms)
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """the p-th percentile of the retained samples"""
+        if not self.samples:
+            return None
+        values = sorted(ms for _, ms in self.samples)
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+        }
+
+
+class Metrics(object):
+    """Per-player latency measurements, recorded from any thread.
+
+    Players are keyed by token, since names can repeat and signatures are whole
+    images; each gets a short label for display and export.
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__players = {}  # token -> (label, {measurement: Series})
+
+    @staticmethod
+    def label(player):
+        if player.name.startswith("data:image"):
+            return f"signature {player.token.hex()[:6]}"
+        return player.name
+
+    def record(self, player, measurement, ms):
+        if player is None:
+            return
+        with self.__lock:
+            entry = self.__players.get(player.token)
+            if entry is None:
+                entry = (self.label(player), {m: Series() for m in MEASUREMENTS})
+                self.__players[player.token] = entry
+            entry[1][measurement].add(ms)
+
+    def clear(self):
+        with self.__lock:
+            self.__players = {}
+
+    def snapshot(self):
+        """{label: {measurement: summary and histogram}}"""
+        with self.__lock:
+            return {
+                label: {
+                    m: dict(s.summary(), histogram=s.histogram.to_dict())
+                    for m, s in series.items()
+                }
+                for label, series in self.__players.values()
+            }
+
+    def rows(self):
+        """every retained sample as (player, measurement, wall time, ms)"""
+        with self.__lock:
+            return [
+                (label, m, t, ms)
+                for label, series in self.__players.values()
+                for m, s in series.items()
+                for t, ms in s.samples
+            ]
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("player", "measurement", "time", "ms"))
+            writer.writerows(self.rows())
+
+    def export(self, directory=METRICS_PATH):
+        """write a JSON summary and a CSV of samples; returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, time.strftime("%Y%m%d-%H%M%S"))
+        paths = (stem + ".json", stem + ".csv")
+        self.write_json(paths[0])
+        self.write_csv(paths[1])
+        logging.info("exported metrics to %s and %s", paths[0], paths[1])
+        return paths
+
+    def report(self):
+        """a plain-text table of p50/p95 per player, for the host overlay"""
+
+        def fmt(summary):
+            if not summary["count"]:
+                return "-"
+            return f"{summary['p50']:.1f}/{summary['p95']:.1f}"
+
+        lines = [f"{'player':<18}" + "".join(f"{m:>16}" for m in MEASUREMENTS)]
+        for label, measurements in self.snapshot().items():
+            lines.append(
+                f"{label[:17]:<18}"
+                + "".join(f"{fmt(measurements[m]):>16}" for m in MEASUREMENTS)
+            )
+        return "\n".join(lines)
+
+
+metrics = Metrics()
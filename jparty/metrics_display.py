@@ -0,0 +1,50 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtGui import QFontDatabase
+from PyQt6.QtCore import Qt, QTimer
+
+from jparty.metrics import metrics
+
+
+class MetricsOverlay(QLabel):
+    """host-side table of per-player latencies, refreshed while it is shown"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self.setStyleSheet(
+            "color: white; background-color: rgba(0, 0, 0, 200); padding: 12px;"
+        )
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.status = ""
+
+        self.__timer = QTimer(self)
+        self.__timer.setInterval(1000)
+        self.__timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def refresh(self):
+        text = "latency p50/p95 (ms)    M: hide  E: export\n\n" + metrics.report()
+        if self.status:
+            text += "\n\n" + self.status
+        self.setText(text)
+
+    def toggle(self):
+        if self.isVisible():
+            self.__timer.stop()
+            self.hide()
+        else:
+            self.setGeometry(self.parent().rect())
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.__timer.start()
+
+    def export(self):
+        try:
+            json_path, csv_path = metrics.export()
+            self.status = f"exported {json_path}\n         {csv_path}"
+        except OSError as e:
+            self.status = f"export failed: {e}"
+        if self.isVisible():
+            self.refresh()
@@ -0,0 +1,131 @@
+"""Bulk import of J-Archive games into the local game library.
+
+    python -m jparty.prefetch 7000-7100 7250 --season 38 --workers 16
+
+Games are downloaded by a bounded pool of workers sharing one pooled HTTP
+session. Every game is written to the library (or its index of incomplete
+games) as soon as it is parsed, so an interrupted import picks up where it
+stopped when run again with the same arguments.
+"""
+
+import re
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from jparty.library import library as default_library
+from jparty.retrieve import fetch_game
+
+
+def make_session(workers):
+    """requests session with a connection pool sized for `workers` threads
+    and automatic retry with exponential backoff on flaky responses and
+    dropped connections"""
+    retry = Retry(
+        total=4,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def season_game_ids(season, session=requests):
+    r = session.get(f"http://www.j-archive.com/showseason.php?season={season}")
+    ids = re.findall(r"showgame\.php\?game_id=(\d+)", r.text)
+    return list(dict.fromkeys(int(i) for i in ids))  # dedupe, keep order
+
+
+def parse_range(s):
+    """'7000-7100' -> [7000, ..., 7100], '7250' -> [7250]"""
+    if "-" in s:
+        start, end = s.split("-")
+        return list(range(int(start), int(end) + 1))
+    return [int(s)]
+
+
+class Prefetcher(object):
+    def __init__(self, library=default_library, workers=8, session=None):
+        self.library = library
+        self.workers = workers
+        self.session = session if session is not None else make_session(workers)
+
+    def pending(self, game_ids):
+        """ids still needing a download: not in the library, not known incomplete"""
+        return [
+            i
+            for i in game_ids
+            if i not in self.library and not self.library.is_incomplete(i)
+        ]
+
+    def __work(self, game_id):
+        # the session's adapter already retries with backoff
+        try:
+            data = fetch_game(game_id, self.session)
+        except Exception:
+            logging.error("cannot fetch game %s", game_id, exc_info=True)
+            return "failed"
+
+        if data is None or not data.complete():
+            self.library.mark_incomplete(game_id)
+            return "incomplete"
+        self.library.put(game_id, data)
+        return "stored"
+
+    def run(self, game_ids, callback=None):
+        """fetch every pending game in `game_ids` into the library.
+        `callback(game_id, status, n_done, n_total)` is called after each game.
+        Returns a dict mapping status to the number of games."""
+        todo = self.pending(game_ids)
+        counts = {"stored": 0, "incomplete": 0, "failed": 0}
+        if not todo:
+            return counts
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.__work, i): i for i in todo}
+            for n, future in enumerate(as_completed(futures), 1):
+                game_id = futures[future]
+                status = future.result()
+                counts[status] += 1
+                if callback is not None:
+                    callback(game_id, status, n, len(todo))
+
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download J-Archive games into the local library")
+    parser.add_argument("games", nargs="*", help="game ids or ranges, e.g. 7000-7100")
+    parser.add_argument("--season", action="append", default=[], help="J-Archive season number")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    prefetcher = Prefetcher(workers=args.workers)
+    game_ids = [i for s in args.games for i in parse_range(s)]
+    for season in args.season:
+        game_ids += season_game_ids(season, prefetcher.session)
+
+    start = time.monotonic()
+
+    def report(game_id, status, n, total):
+        rate = n / (time.monotonic() - start) * 60
+        print(f"[{n}/{total}] game {game_id}: {status} ({rate:.0f} games/min)")
+
+    counts = prefetcher.run(game_ids, report)
+    print(
+        f"{counts['stored']} stored, {counts['incomplete']} incomplete, "
+        f"{counts['failed']} failed in {time.monotonic() - start:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,11 @@
 import requests
-from bs4 import BeautifulSoup
-from html import unescape
 import re
 import json
-from jparty.game import Question, Board, FinalBoard, GameData
+from jparty.engine import Question, Board, FinalBoard, GameData
 import logging
 import csv
-from jparty.constants import MONIES
+from jparty.library import library
+from jparty.jarchive import parse_game_page
 
 
 def list_to_game(s):
@@ -42,97 +41,87 @@ def list_to_game(s):
     return GameData(boards, date, comments)
 
 
-def get_Gsheet_game(file_id):
+def get_Gsheet_game(file_id, session=requests):
     csv_url = f"https://docs.google.com/spreadsheet/ccc?key={file_id}&output=csv"
-    with requests.get(csv_url, stream=True) as r:
+    with session.get(csv_url, stream=True) as r:
         lines = (line.decode("utf-8") for line in r.iter_lines())
         r3 = csv.reader(lines)
         return list_to_game(list(r3))
 
 
-def get_game(game_id):
-    if len(str(game_id)) < 7:
-        return get_wayback_jarchive_game(game_id)
-    else:
-        return get_Gsheet_game(str(game_id))
+class TimeoutSession(requests.Session):
+    """session applying a default timeout to every request"""
 
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
 
-def findanswer(clue):
-    return re.findall(r'correct_response">(.*?)</em', unescape(str(clue)))[0]
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(*args, **kwargs)
 
-def get_JArchive_Game(game_id, wayback_url=None):
-    logging.info(f"getting game {game_id}")
-    if wayback_url is not None:
-        r = requests.get(wayback_url)
+
+def fetch_game(game_id, session=requests):
+    """download and parse a game, bypassing the local library.
+    `session` may be a shared requests.Session to reuse pooled connections"""
+    if len(str(game_id)) < 7:
+        return get_wayback_jarchive_game(game_id, session)
     else:
-        r = requests.get(f"http://www.j-archive.com/showgame.php?game_id={game_id}")
-    soup = BeautifulSoup(r.text, "html.parser")
-    datesearch = re.search(
-        r"- \w+, (.*?)$", soup.select("#game_title > h1")[0].contents[0]
-    )
-    if datesearch is None:
-        return None
-    date = datesearch.groups()[0]
-    comments = soup.select("#game_comments")[0].contents
-    comments = comments[0] if len(comments) > 0 else ""
+        return get_Gsheet_game(str(game_id), session)
 
-    # Normal Rounds
-    boards = []
-    rounds = soup.find_all(class_="round")
-    for i, ro in enumerate(rounds):
-        categories_objs = ro.find_all(class_="category")
-        categories = [c.find(class_="category_name").text for c in categories_objs]
-        questions = []
-        for clue in ro.find_all(class_="clue"):
-            text_obj = clue.find(class_="clue_text")
-            if text_obj is None:
-                logging.info("this game is incomplete")
-                return None
-
-            text = text_obj.text
-            index_key = text_obj["id"]
-            index = (
-                int(index_key[-3]) - 1,
-                int(index_key[-1]) - 1,
-            )  # get index from id string
-            dd = clue.find(class_="clue_value_daily_double") is not None
-            value = MONIES[i][index[1]]
-            answer = findanswer(clue)
-            questions.append(
-                Question(index, text, answer, categories[index[0]], value, dd)
-            )
-        boards.append(Board(categories, questions, dj=(i == 1)))
-
-    # Final Jeopardy
-    final_round_obj = soup.find_all(class_="final_round")[0]
-    category_obj = final_round_obj.find_all(class_="category")[0]
-    category = category_obj.find(class_="category_name").text
-    clue = final_round_obj.find_all(class_="clue")[0]
-    text_obj = clue.find(class_="clue_text")
-    if text_obj is None:
-        logging.info("this game is incomplete")
-        return None
 
-    text = text_obj.text
-    answer = findanswer(final_round_obj)
-    question = Question((0, 0), text, answer, category)
+def get_game(game_id, session=requests):
+    data = library.get(game_id)
+    if data is not None:
+        logging.info("game %s loaded from library", game_id)
+        return data
 
-    boards.append(FinalBoard(category, question))
+    if library.is_incomplete(game_id):
+        logging.info("game %s is known to be incomplete", game_id)
+        return None
 
-    return GameData(boards, date, comments)
+    try:
+        data = fetch_game(game_id, session)
+    except requests.exceptions.RequestException:
+        # offline: an expired copy is better than nothing
+        data = library.get(game_id, allow_expired=True)
+        if data is None:
+            raise
+        logging.info("offline, using expired library copy of %s", game_id)
+        return data
+
+    try:
+        if data is None or not data.complete():
+            # not stored, so the random pool can never pick it from the library
+            library.mark_incomplete(game_id)
+        else:
+            library.put(game_id, data)
+    except OSError:
+        # a full or read-only disk shouldn't cost a game we already have
+        logging.warning("cannot store game %s in the library", game_id, exc_info=True)
+    return data
+
+
+def get_JArchive_Game(game_id, wayback_url=None, session=requests):
+    logging.info("getting game %s", game_id)
+    if wayback_url is not None:
+        r = session.get(wayback_url)
+    else:
+        r = session.get(f"http://www.j-archive.com/showgame.php?game_id={game_id}")
+    return parse_game_page(r.text)
 
-def get_wayback_jarchive_game(game_id):
+def get_wayback_jarchive_game(game_id, session=requests):
     # kudos to Abhi Kumbar: https://medium.com/analytics-vidhya/the-wayback-machine-scraper-63238f6abb66
     # this query's the wayback cdx api for possible instances of the saved jarchive page with the specified game id & returns the latest one
     JArchive_url = f"j-archive.com/showgame.php?game_id={str(game_id)}"  # use the url w/o the http:// or https:// to include both in query
     url = f'http://web.archive.org/cdx/search/cdx?url={JArchive_url}&collapse=digest&limit=-2&fastLatest=true&output=json'  # for some reason, using limit=-1 does not work
-    urls = requests.get(url).text
+    urls = session.get(url).text
     parse_url = json.loads(urls)  # parses the JSON from urls.
     if len(parse_url) == 0:  # if no results, return None
         logging.info("no games found in wayback")
         # return None
         # alternative: use fallback to get game from scraping j-archive directly
-        return get_JArchive_Game(game_id)
+        return get_JArchive_Game(game_id, session=session)
 
     ## Extracts timestamp and original columns from urls and compiles a url list.
     url_list = []
@@ -143,7 +132,7 @@ def get_wayback_jarchive_game(game_id):
         final_url = f'http://web.archive.org/web/{waylink}'
         url_list.append(final_url)
     latest_url = url_list[-1]
-    return get_JArchive_Game(game_id, latest_url)
+    return get_JArchive_Game(game_id, latest_url, session)
 
 def get_game_sum(soup):
     date = re.search(
@@ -154,8 +143,10 @@ def get_game_sum(soup):
     return date, comments
 
 
-def get_random_game():
-    r = requests.get("http://j-archive.com/")
+def get_random_game(session=requests):
+    from bs4 import BeautifulSoup  # only this page still goes through bs4
+
+    r = session.get("http://j-archive.com/")
     soup = BeautifulSoup(r.text, "html.parser")
 
     link = soup.find_all(class_="splash_clue_footer")[1].find("a")["href"]
@@ -0,0 +1,258 @@
+from PyQt6.QtCore import Qt, QObject, QTimer, QThread, pyqtSignal
+
+import heapq
+import math
+import time
+import logging
+from itertools import count
+from threading import Lock
+
+from jparty.constants import ANIMATION_FPS
+
+
+class ScheduledCall(object):
+    """handle for a callback scheduled on the TimerService"""
+
+    def __init__(self, deadline, f, args, kwargs):
+        self.deadline = deadline
+        self.f = f
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerService(QObject):
+    """Runs scheduled callbacks on the GUI thread from a single QTimer.
+
+    Deadlines are kept in a heap on the monotonic clock, and the one precise
+    QTimer is always armed for the earliest of them. `schedule` may be called
+    from any thread; the callbacks always run on the thread owning the service.
+    """
+
+    __rearm_trigger = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.__heap = []
+        self.__counter = count()  # tie-breaker so equal deadlines keep their order
+        self.__lock = Lock()
+
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.__timer.timeout.connect(self.__fire)
+        self.__rearm_trigger.connect(self.__rearm, Qt.ConnectionType.QueuedConnection)
+
+    @staticmethod
+    def now():
+        return time.monotonic()
+
+    def schedule(self, delay, f, *args, **kwargs):
+        """call `f(*args, **kwargs)` in `delay` seconds; returns a ScheduledCall"""
+        call = ScheduledCall(self.now() + delay, f, args, kwargs)
+        with self.__lock:
+            heapq.heappush(self.__heap, (call.deadline, next(self.__counter), call))
+
+        if QThread.currentThread() is self.thread():
+            self.__rearm()
+        else:
+            self.__rearm_trigger.emit()
+        return call
+
+    def __rearm(self):
+        with self.__lock:
+            while self.__heap and self.__heap[0][2].cancelled:
+                heapq.heappop(self.__heap)
+            if not self.__heap:
+                self.__timer.stop()
+                return
+            deadline = self.__heap[0][0]
+
+        ms = max(0, math.ceil((deadline - self.now()) * 1000))
+        self.__timer.start(ms)
+
+    def __fire(self):
+        now = self.now()
+        due = []
+        with self.__lock:
+            while self.__heap and self.__heap[0][0] <= now:
+                due.append(heapq.heappop(self.__heap)[2])
+
+        for call in due:
+            if not call.cancelled:
+                try:
+                    call.f(*call.args, **call.kwargs)
+                except Exception:
+                    logging.error("scheduled call failed", exc_info=True)
+
+        self.__rearm()
+
+
+_timer_service = None
+
+
+def timer_service():
+    """the process-wide TimerService, created on first use (on the GUI thread)"""
+    global _timer_service
+    if _timer_service is None:
+        _timer_service = TimerService()
+    return _timer_service
+
+
+class QuestionTimer(object):
+    """A pausable countdown that calls `f` on the GUI thread when it runs out.
+
+    Elapsed time is measured on the monotonic clock, so pausing and resuming
+    does not drift however many times a clue is buzzed in on.
+    """
+
+    def __init__(self, interval, f, *args, **kwargs):
+        super().__init__()
+        self.f = f
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.__call = None
+        self.__start_time = None
+        self.__elapsed_time = 0
+
+    @property
+    def running(self):
+        return self.__call is not None
+
+    def start(self):
+        """wrapper for resume"""
+        self.resume()
+
+    def cancel(self):
+        """wrapper for pause"""
+        self.pause()
+
+    def pause(self):
+        if not self.running:
+            return
+        self.__call.cancel()
+        self.__call = None
+        self.__elapsed_time += TimerService.now() - self.__start_time
+
+    def resume(self):
+        if self.running:
+            return
+        self.__start_time = TimerService.now()
+        self.__call = timer_service().schedule(self.remaining(), self.__finish)
+
+    def elapsed(self):
+        if self.running:
+            return self.__elapsed_time + TimerService.now() - self.__start_time
+        return self.__elapsed_time
+
+    def remaining(self):
+        return max(0.0, self.interval - self.elapsed())
+
+    def __finish(self):
+        self.pause()
+        self.f(*self.args, **self.kwargs)
+
+
+class Timeline(object):
+    """A list of (time offset, callback) keyframes played back by the Animator.
+
+    Callbacks run on the GUI thread on the first frame at or after their offset.
+    A looping timeline repeats every `period` seconds (by default the offset of
+    the last keyframe) until it is stopped.
+    """
+
+    def __init__(self, keyframes, loop=False, period=None):
+        self.keyframes = sorted(keyframes, key=lambda k: k[0])
+        self.loop = loop
+        if period is None:
+            period = self.keyframes[-1][0] if self.keyframes else 0
+        self.period = period
+        self.__start_time = None
+        self.__next = 0
+        self.__cycle = 0
+
+    @property
+    def running(self):
+        return self.__start_time is not None
+
+    def start(self):
+        """(re)start from the first keyframe"""
+        self.stop()
+        self.__start_time = TimerService.now()
+        self.__next = 0
+        self.__cycle = 0
+        animator().add(self)
+        self.advance(self.__start_time)  # keyframes at offset 0 apply immediately
+
+    def stop(self):
+        if self.running:
+            self.__start_time = None
+            animator().remove(self)
+
+    def advance(self, now):
+        while self.running:
+            elapsed = now - self.__start_time
+            if self.__next < len(self.keyframes):
+                offset, f = self.keyframes[self.__next]
+                if offset + self.__cycle * self.period > elapsed:
+                    return
+                self.__next += 1
+                f()
+            elif self.loop and self.period > 0:
+                # skip whole cycles if we fell behind rather than replaying them
+                self.__cycle = max(self.__cycle + 1, int(elapsed // self.period))
+                self.__next = 0
+            else:
+                self.stop()
+
+
+class Animator(QObject):
+    """Steps every running Timeline from one frame timer on the GUI thread.
+
+    The frame timer only runs while some timeline is active, and keyframes land
+    on frame boundaries, so the widget updates they trigger are coalesced by Qt
+    into at most one repaint per frame.
+    """
+
+    def __init__(self, fps=ANIMATION_FPS, parent=None):
+        super().__init__(parent)
+        self.__timelines = []
+        self.__timer = QTimer(self)
+        self.__timer.setInterval(int(1000 / fps))
+        self.__timer.timeout.connect(self.__frame)
+
+    def add(self, timeline):
+        if timeline not in self.__timelines:
+            self.__timelines.append(timeline)
+        if not self.__timer.isActive():
+            self.__timer.start()
+
+    def remove(self, timeline):
+        if timeline in self.__timelines:
+            self.__timelines.remove(timeline)
+        if not self.__timelines:
+            self.__timer.stop()
+
+    def __frame(self):
+        now = TimerService.now()
+        for timeline in list(self.__timelines):
+            try:
+                timeline.advance(now)
+            except Exception:
+                logging.error("animation frame failed", exc_info=True)
+                timeline.stop()
+
+
+_animator = None
+
+
+def animator():
+    """the process-wide Animator, created on first use (on the GUI thread)"""
+    global _animator
+    if _animator is None:
+        _animator = Animator()
+    return _animator
@@ -1,14 +1,14 @@
-from PyQt6.QtGui import QPainter, QPixmap, QImage, QPalette, QColor, QIcon
+from PyQt6.QtGui import QPainter, QPalette, QColor, QIcon
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSizePolicy, QPushButton
-from PyQt6.QtCore import Qt, QSize, QPoint
+from PyQt6.QtCore import QSize, QPoint, QEvent
 
 import time
-from threading import Thread
-from base64 import urlsafe_b64decode
 from functools import partial
 
 from jparty.style import MyLabel
-from jparty.utils import resource_path
+from jparty.assets import pixmap, scaled_pixmap, scaled_signature
+from jparty.scheduler import Timeline
+from jparty.metrics import metrics, SIGNAL_PAINT
 
 
 class NameLabel(MyLabel):
@@ -18,10 +18,8 @@ class NameLabel(MyLabel):
         self.signature = None
         super().__init__("", self.startNameFontSize, parent)
 
-        if name[:21] == "data:image/png;base64":
-            i = QImage()
-            i.loadFromData(urlsafe_b64decode(name[22:]), "PNG")
-            self.signature = QPixmap.fromImage(i)
+        if name.startswith("data:image/png;base64,"):
+            self.signature = name  # decoded and scaled through the assets cache
         else:
             self.setText(name)
 
@@ -35,10 +33,10 @@ class NameLabel(MyLabel):
         super().resizeEvent(event)
         if self.signature is not None:
             self.setPixmap(
-                self.signature.scaled(
-                    int(self.height() * NameLabel.name_aspect_ratio),
-                    self.height(),
-                    transformMode=Qt.TransformationMode.SmoothTransformation,
+                scaled_signature(
+                    self.signature,
+                    QSize(int(self.height() * NameLabel.name_aspect_ratio), self.height()),
+                    dpr=self.devicePixelRatioF(),
                 )
             )
 
@@ -51,9 +49,7 @@ class PlayerWidget(QWidget):
         super().__init__(parent)
         self.player = player
         self.game = game
-        self.__buzz_hint_thread = None
-        self.__flash_thread = None
-        self.__light_thread = None
+        self.paint_mark = None
 
         self.name_label = NameLabel(player.name, self)
         self.score_label = MyLabel("$0", self.startScoreFontSize, self)
@@ -63,13 +59,25 @@ class PlayerWidget(QWidget):
 
         self.setMouseTracking(True)
 
-        self.main_background = QPixmap(resource_path("player.png"))
-        self.active_background = QPixmap(resource_path("player_active.png"))
-        self.lights_backgrounds = [
-            QPixmap(resource_path(f"player_lights{i}.png")) for i in range(1, 6)
-        ]
+        self.main_background = "player.png"
+        self.active_background = "player_active.png"
+        self.lights_backgrounds = [f"player_lights{i}.png" for i in range(1, 6)]
         self.background = self.main_background
 
+        self.__buzz_hint = Timeline(
+            [
+                (0.0, lambda: self.set_lights(True)),
+                (0.25, lambda: self.set_lights(False)),
+            ]
+        )
+        # step through the lights images once a second, then stay lit
+        keyframes = [
+            (float(i), partial(self.__set_background, img))
+            for i, img in enumerate(self.lights_backgrounds)
+        ]
+        keyframes.append((float(len(keyframes)), lambda: self.set_lights(True)))
+        self.__lights = Timeline(keyframes)
+
         self.highlighted = False
 
         layout = QVBoxLayout()
@@ -102,14 +110,12 @@ class PlayerWidget(QWidget):
         self.background = self.active_background if val else self.main_background
         self.update()
 
-    def __buzz_hint(self):
-        self.set_lights(True)
-        time.sleep(0.25)
-        self.set_lights(False)
+    def __set_background(self, img):
+        self.background = img
+        self.update()
 
     def buzz_hint(self):
-        self.__buzz_hint_thread = Thread(target=self.__buzz_hint, name="buzz_hint")
-        self.__buzz_hint_thread.start()
+        self.__buzz_hint.start()
 
     def update_score(self):
         score = self.player.score
@@ -123,24 +129,11 @@ class PlayerWidget(QWidget):
         self.score_label.setText(f"{score:,}")
 
     def run_lights(self):
-        self.__light_thread = Thread(target=self.__lights, name="lights")
-        self.__light_thread.start()
+        self.__lights.start()
 
     def stop_lights(self):
-        self.__light_thread = None
+        self.__lights.stop()
         self.set_lights(False)
-        self.update()
-
-    def __lights(self):
-        for img in self.lights_backgrounds:
-            self.background = img
-            self.update()
-            time.sleep(1.0)
-            if self.__light_thread is None:  # provide stopability
-                return None
-
-        self.set_lights(True)
-        self.update()
 
     def mousePressEvent(self, event):
         if self.game.soliciting_player:
@@ -149,11 +142,19 @@ class PlayerWidget(QWidget):
 
         self.game.adjust_score(self.player)
 
+    def mark_paint(self, t):
+        """record the delay from monotonic time `t` to the next repaint"""
+        self.paint_mark = t
+
     def paintEvent(self, event):
         qp = QPainter()
         qp.begin(self)
-        qp.drawPixmap(self.rect(), self.background)
+        qp.drawPixmap(0, 0, scaled_pixmap(self.background, self.size(), dpr=self.devicePixelRatioF()))
         qp.end()
+        if self.paint_mark is not None:
+            ms = (time.monotonic() - self.paint_mark) * 1000
+            self.paint_mark = None
+            metrics.record(self.player, SIGNAL_PAINT, ms)
 
     def leaveEvent(self, event):
         if self.game.soliciting_player:
@@ -171,7 +172,7 @@ class HostPlayerWidget(PlayerWidget):
         self.remove_button = QPushButton("", self)
         # self.remove_button.setStyleSheet("color: red")
         self.remove_button.clicked.connect(partial(self.game.remove_player, player))
-        self.remove_button.setIcon(QIcon(resource_path("close-icon.png")))
+        self.remove_button.setIcon(QIcon(pixmap("close-icon.png")))
         self.remove_button.show()
 
     def resizeEvent(self, event):
@@ -182,6 +183,12 @@ class HostPlayerWidget(PlayerWidget):
             self.remove_button.resize(QSize(xbutton_size, xbutton_size))
             self.remove_button.setIconSize(self.size())
 
+    def event(self, event):
+        # refresh the network stats just before the tooltip shows
+        if event.type() == QEvent.Type.ToolTip and self.player.waiter is not None:
+            self.setToolTip(self.player.waiter.clock.summary())
+        return super().event(event)
+
 
 class ScoreBoard(QWidget):
     def __init__(self, game, parent=None):
@@ -223,7 +230,7 @@ class ScoreBoard(QWidget):
     def paintEvent(self, event):
         qp = QPainter()
         qp.begin(self)
-        qp.drawPixmap(self.rect(), QPixmap(resource_path("podium.png")))
+        qp.drawPixmap(0, 0, scaled_pixmap("podium.png", self.size(), dpr=self.devicePixelRatioF()))
         qp.end()
 
 
@@ -0,0 +1,138 @@
+"""Startup benchmark for JParty.
+
+    python -m jparty.startup --runs 5 --top 15
+
+Launches the app `runs` times, each in a fresh interpreter run with
+-X importtime, and quits each launch as soon as both displays have painted.
+Reports the time from process start to the first frame, to the start of
+main() (the imports), and the modules that took longest to import before the
+first frame. Like the app, run it from the jparty folder.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+from PyQt6.QtCore import QObject, QEvent, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+
+BENCHMARK_ENV = "JPARTY_STARTUP_BENCHMARK"
+MARKER = "jparty-startup"
+
+
+def benchmarking():
+    return os.environ.get(BENCHMARK_ENV) is not None
+
+
+def mark(stage):
+    """report reaching `stage` to a benchmark run, if this is one"""
+    if benchmarking():
+        # stderr, so it lands in order among -X importtime's lines
+        print(f"{MARKER} {stage} {time.time()}", file=sys.stderr, flush=True)
+
+
+class FirstFrame(QObject):
+    """Emits `painted` once every one of `windows` has painted, after the
+    paint has been flushed. Work connected to it runs after the user sees
+    the app rather than before."""
+
+    painted = pyqtSignal()
+
+    def __init__(self, windows):
+        super().__init__()
+        self.__waiting = set(windows)
+        QApplication.instance().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and obj.isWidgetType():
+            self.__waiting.discard(obj.window())
+            if not self.__waiting:
+                QApplication.instance().removeEventFilter(self)
+                QTimer.singleShot(0, self.__painted)
+        return False
+
+    def __painted(self):
+        mark("frame")
+        self.painted.emit()
+
+
+def launch():
+    """run the app once until its first frame; returns the seconds to main()
+    and to the first frame, and the import times (module -> seconds, self and
+    cumulative) before that frame"""
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, **{BENCHMARK_ENV: "1"})
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (package_parent, env.get("PYTHONPATH")) if path
+    )
+    start = time.time()
+    p = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from jparty.main import main; main()"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=60,
+    )
+
+    stages = {}
+    imports = {}
+    for line in p.stderr.splitlines():
+        if line.startswith(MARKER):
+            _, stage, t = line.split()
+            stages[stage] = float(t) - start
+        elif line.startswith("import time:") and "frame" not in stages:
+            own, cumulative, name = line[len("import time:") :].split("|")
+            if name.strip() == "site":
+                imports.clear()  # the interpreter's own startup, not the app's
+            elif own.strip().isdigit():
+                imports[name.strip()] = (int(own) / 1e6, int(cumulative) / 1e6)
+
+    if "frame" not in stages:
+        raise RuntimeError(f"the app exited before its first frame:\n{p.stderr[-2000:]}")
+    return stages["main"], stages["frame"], imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time JParty's startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    args = parser.parse_args()
+
+    to_main, to_frame = [], []
+    imports = defaultdict(list)
+    for _ in range(args.runs):
+        m, f, i = launch()
+        to_main.append(m)
+        to_frame.append(f)
+        for name, times in i.items():
+            imports[name].append(times)
+
+    ms = lambda t: f"{statistics.median(t) * 1000:.0f} ms"
+    print(f"{args.runs} launches, medians from process start:")
+    print(f"  imports done (main): {ms(to_main)}")
+    print(f"  first frame:         {ms(to_frame)}")
+
+    # the packages' own entries (not their submodules), and each jparty module
+    top = {
+        name: times
+        for name, times in imports.items()
+        if "." not in name or name.startswith("jparty.")
+    }
+    print("slowest imports before the first frame (cumulative / self):")
+    slowest = sorted(
+        top.items(), key=lambda kv: statistics.median(c for _, c in kv[1]), reverse=True
+    )
+    for name, times in slowest[: args.top]:
+        cumulative = ms([c for _, c in times])
+        own = ms([o for o, _ in times])
+        print(f"  {name:<28} {cumulative:>8} / {own}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,12 @@
-import simpleaudio as sa
-
-from threading import Thread
+from functools import lru_cache
 import re
 import os
 import sys
 
 
-from PyQt6.QtGui import QColor, QFontMetrics
+from PyQt6.QtGui import QColor, QFont, QFontMetrics
 from PyQt6.QtWidgets import QGraphicsDropShadowEffect, QLabel, QPushButton, QSizePolicy
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QRect
 
 
 def resource_path(relative_path):
@@ -23,41 +21,6 @@ def resource_path(relative_path):
     return os.path.join(base_path, "data", relative_path)
 
 
-class SongPlayer(object):
-    def __init__(self):
-        super().__init__()
-        self.__wave_obj = sa.WaveObject.from_wave_file(resource_path("intro.wav"))
-        self.__final = sa.WaveObject.from_wave_file(resource_path("final.wav"))
-        self.__play_obj = None
-        self.__repeating = False
-        self.__repeat_thread = None
-
-    def play(self, repeat=False):
-        self.__repeating = repeat
-        self.__play_obj = self.__wave_obj.play()
-        if repeat:
-            self.__repeat_thread = Thread(target=self.__repeat)
-            self.__repeat_thread.start()
-
-    def final(self, repeat=False):
-        self.__repeating = repeat
-        self.__play_obj = self.__final.play()
-        if repeat:
-            self.__repeat_thread = Thread(target=self.__repeat)
-            self.__repeat_thread.start()
-
-    def stop(self):
-        self.__repeating = False
-        self.__play_obj.stop()
-
-    def __repeat(self):
-        while True:
-            self.__play_obj.wait_done()
-            if not self.__repeating:
-                break
-            self.__play_obj = self.__wave_obj.play()
-
-
 class CompoundObject(object):
     def __init__(self, *objs):
         self.__objs = list(objs)
@@ -95,6 +58,36 @@ def add_shadow(widget, radius=0.1, offset=3):
     widget.setGraphicsEffect(shadow)
 
 
+@lru_cache(maxsize=4096)
+def fit_font_size(font_key, text, rect, flags, initial):
+    """Largest pixel size up to `initial` at which `text` fits inside `rect`.
+
+    Binary search over the size, assuming the text only grows with the font.
+    Shared by every autosizing widget, so the same text in the same box (e.g. the
+    board cards on both displays) is only measured once. `font_key` is the
+    QFont.toString() of the font and `rect` is (x, y, width, height).
+    """
+    font = QFont()
+    font.fromString(font_key)
+    rect = QRect(*rect)
+
+    def fits(size):
+        font.setPixelSize(size)
+        return rect.contains(QFontMetrics(font).boundingRect(rect, flags, text))
+
+    if initial <= 2 or fits(initial):
+        return initial
+
+    lo, hi = 2, initial - 1  # like the old linear search, never go below 2
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
 class AutosizeWidget(object):
     """This class is a mixin which must be inherited with a QWidget with a `text()` method."""
 
@@ -147,10 +140,7 @@ class AutosizeWidget(object):
         else:
             raise Exception("Need 1, 2, or 4 arguments")
 
-    def autofitsize(self, stepsize=1):
-
-        font = self.font()
-
+    def autofitsize(self):
         ml, mt, mr, md = self.autosize_margins
         rect = self.rect().adjusted(
             int(self.width() * ml),
@@ -159,25 +149,17 @@ class AutosizeWidget(object):
             int(-self.height() * mt),
         )
 
-        text = self.plaintext()
+        font = QFont(self.font())
+        initial = max(int(self.initialSize()), 1)
+        font.setPixelSize(initial)
 
-        font.setPixelSize(int(self.initialSize()))
-        size = font.pixelSize()
-
-        def fullrect(font):
-            fm = QFontMetrics(font)
-            return fm.boundingRect(rect, self.flags(), text)
-
-        newrect = fullrect(font)
-        if not rect.contains(newrect):
-            while size > 2:
-                size -= stepsize
-                font.setPixelSize(size)
-                newrect = fullrect(font)
-                if rect.contains(newrect):
-                    return font.pixelSize()
-
-        return size
+        return fit_font_size(
+            font.toString(),
+            self.plaintext(),
+            (rect.x(), rect.y(), rect.width(), rect.height()),
+            self.flags(),
+            initial,
+        )
 
 
 class DynamicLabel(QLabel, AutosizeWidget):
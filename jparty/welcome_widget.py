@@ -1,4 +1,4 @@
-from PyQt6.QtGui import QPainter, QBrush, QImage, QFont, QPalette, QPixmap
+from PyQt6.QtGui import QPainter, QBrush, QColor, QImage, QFont, QPalette, QPixmap
 from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -11,49 +11,39 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QSize, pyqtSignal
 
 import qrcode
-import time
-from threading import Thread
 import logging
+from functools import lru_cache
 
 from jparty.version import version
-from jparty.retrieve import get_game, get_random_game
-from jparty.utils import resource_path, add_shadow, DynamicLabel, DynamicButton
+from jparty.loader import GameLoader, RandomGamePool
+from jparty.utils import add_shadow, DynamicLabel, DynamicButton
+from jparty.assets import scaled_pixmap
 from jparty.helpmsg import helpmsg
 from jparty.style import WINDOWPAL
 
 
-class Image(qrcode.image.base.BaseImage):
-    """QR code image widget"""
-
-    def __init__(self, border, width, box_size):
-        self.border = border
-        self.width = width
-        self.box_size = box_size
-        size = (width + border * 2) * box_size
-        self._image = QImage(size, size, QImage.Format.Format_RGB16)
-        self._image.fill(WINDOWPAL.color(QPalette.ColorRole.Window))
-
-    def pixmap(self):
-        return QPixmap.fromImage(self._image)
-
-    def drawrect(self, row, col):
-        painter = QPainter(self._image)
-        painter.fillRect(
-            (col + self.border) * self.box_size,
-            (row + self.border) * self.box_size,
-            self.box_size,
-            self.box_size,
-            Qt.GlobalColor.black,
-        )
+@lru_cache(maxsize=4)
+def qr_image(data):
+    """The QR code for `data`, with its quiet zone, at one pixel per module.
+    The module matrix is only worked out once per URL; widgets scale this up."""
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    n = len(matrix)
 
-    def save(self, stream, kind=None):
-        pass
+    # one byte per module indexing a two colour table, written in a single pass
+    modules = bytes(dark for row in matrix for dark in row)
+    image = QImage(modules, n, n, n, QImage.Format.Format_Indexed8)
+    image.setColorTable(
+        [WINDOWPAL.color(QPalette.ColorRole.Window).rgb(), QColor(Qt.GlobalColor.black).rgb()]
+    )
+    return image.copy()  # detach from `modules`
 
 
 class StartWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.icon = QPixmap(resource_path("icon.png"))
         self.icon_label = DynamicLabel("", 0, self)
 
         add_shadow(self, radius=0.2)
@@ -73,17 +63,14 @@ class StartWidget(QWidget):
     def resizeEvent(self, event):
         icon_size = self.icon_label.height()
         self.icon_label.setPixmap(
-            self.icon.scaled(
-                icon_size,
-                icon_size,
-                transformMode=Qt.TransformationMode.SmoothTransformation,
+            scaled_pixmap(
+                "icon.png", QSize(icon_size, icon_size), dpr=self.devicePixelRatioF()
             )
         )
         self.icon_label.setMaximumWidth(icon_size)
 
 
 class Welcome(StartWidget):
-    gameid_trigger = pyqtSignal(str)
     summary_trigger = pyqtSignal(str)
 
     def __init__(self, game, parent=None):
@@ -116,6 +103,14 @@ class Welcome(StartWidget):
         )
         self.gameid_label.setOpenExternalLinks(True)
 
+        self.loader = GameLoader(parent=self)
+        self.loader.loaded.connect(self.game_loaded)
+        self.loader.failed.connect(self.game_failed)
+
+        self.__awaiting_random = False
+        self.random_pool = RandomGamePool(parent=self)
+        self.random_pool.ready.connect(self.random_ready)
+
         self.textbox = QLineEdit(self)
         self.textbox.textChanged.connect(self.show_summary)
         f = self.textbox.font()
@@ -172,7 +167,6 @@ class Welcome(StartWidget):
         main_layout.addLayout(footer_layout, 3)
         main_layout.addStretch(3)
 
-        self.gameid_trigger.connect(self.set_gameid)
         self.summary_trigger.connect(self.set_summary)
 
         self.setLayout(main_layout)
@@ -199,38 +193,50 @@ class Welcome(StartWidget):
         f.setPixelSize(int(textbox_height * 0.9))
         self.textbox.setFont(f)
 
-    def __random(self):
-        while True:
-            game_id = get_random_game()
-            logging.info(f"GAMEID {game_id}")
-            self.game.data = get_game(game_id)
-            if self.game.valid_game():
-                break
-            else:
-                time.sleep(0.25)
-
-        self.gameid_trigger.emit(str(game_id))
-        self.summary_trigger.emit(self.game.data.date + "\n" + self.game.data.comments)
-
     def random(self, checked):
-        self.summary_trigger.emit("Loading...")
-        t = Thread(target=self.__random)
-        t.start()
-
-    def __show_summary(self):
-        game_id = self.textbox.text()
-        try:
-            self.game.data = get_game(game_id)
-            if self.game.valid_game():
-                self.summary_trigger.emit(
-                    self.game.data.date + "\n" + self.game.data.comments
-                )
-            else:
-                self.summary_trigger.emit("Game has blank questions")
-
-        except Exception:
-            self.summary_trigger.emit("Cannot get game")
+        item = self.random_pool.take()
+        if item is None:
+            self.__awaiting_random = True
+            self.summary_trigger.emit("Loading...")
+            return
+
+        game_id, data = item
+        self.__awaiting_random = False
+        logging.info("GAMEID %s", game_id)
+        self.loader.cancel()
+        self.textbox.blockSignals(True)
+        self.set_gameid(game_id)
+        self.textbox.blockSignals(False)
+        self.game_loaded(game_id, data)
+
+    def random_ready(self):
+        if self.__awaiting_random:
+            self.random(False)
+
+    def summary(self):
+        if self.game.valid_game():
+            return self.game.data.date + "\n" + self.game.data.comments
+        else:
+            return "Game has blank questions"
+
+    def current_gameid(self, game_id):
+        """whether `game_id` is still the id in the textbox. The loader's results
+        are queued to this thread, so the host may have typed another since"""
+        return str(game_id).strip() == self.textbox.text().strip()
+
+    def game_loaded(self, game_id, data):
+        if not self.current_gameid(game_id):
+            logging.info("dropping game %s, no longer selected", game_id)
+            return
+        self.game.data = data
+        self.summary_trigger.emit(self.summary())
+        self.check_start()
 
+    def game_failed(self, game_id):
+        if not self.current_gameid(game_id):
+            return
+        self.game.data = None
+        self.summary_trigger.emit("Cannot get game")
         self.check_start()
 
     def set_summary(self, text):
@@ -240,9 +246,15 @@ class Welcome(StartWidget):
         self.textbox.setText(text)
 
     def show_summary(self, text=None):
-        self.summary_trigger.emit("Loading...")
-        t = Thread(target=self.__show_summary)
-        t.start()
+        self.__awaiting_random = False  # whatever was typed replaces the request
+        self.game.data = None
+        game_id = self.textbox.text()
+        if game_id.strip() == "":
+            self.loader.cancel()
+            self.summary_trigger.emit("")
+        else:
+            self.summary_trigger.emit("Loading...")
+            self.loader.request(game_id)
 
         self.check_start()
 
@@ -273,6 +285,7 @@ class QRWidget(StartWidget):
         self.qrlabel.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         self.url = "http://" + host
+        self.__qr_pixmaps = {}  # box size -> pixmap
         self.url_label = DynamicLabel(self.url, self.start_fontsize, self)
         self.url_label.setFont(self.font)
         self.url_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -291,13 +304,26 @@ class QRWidget(StartWidget):
     def start_fontsize(self):
         return 0.1 * self.width()
 
+    def qr_pixmap(self, box_size):
+        """the QR code with `box_size` pixels per module, scaled once per size"""
+        p = self.__qr_pixmaps.get(box_size)
+        if p is None:
+            image = qr_image(self.url)
+            size = image.width() * box_size
+            p = QPixmap.fromImage(
+                image.scaled(
+                    size,
+                    size,
+                    Qt.AspectRatioMode.IgnoreAspectRatio,
+                    Qt.TransformationMode.FastTransformation,
+                )
+            )
+            self.__qr_pixmaps[box_size] = p
+        return p
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        self.qrlabel.setPixmap(
-            qrcode.make(
-                self.url, image_factory=Image, box_size=max(self.height() / 50, 1)
-            ).pixmap()
-        )
+        self.qrlabel.setPixmap(self.qr_pixmap(max(self.height() // 50, 1)))
 
     def restart(self):
         pass